@@ -1,21 +1,79 @@
+import asyncio
+import logging
 import re
 import time
 from pathlib import Path
+from typing import Any
 
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from fastmcp.exceptions import ToolError
 from fastmcp.server.context import Context
-from markdownify import markdownify
+from markdownify import MarkdownConverter
 
 from d3_mcp_server.modules import BASE_URL
 
+logger = logging.getLogger(__name__)
+
 CACHE_DIR = Path.home() / ".cache" / "d3-mcp-server"
 CACHE_TTL_SECONDS = 24 * 60 * 60  # 24 hours
 
+# Fetches in flight at once in a batch; matches the client's keep-alive pool
+# so every connection opened for a batch can be reused by the next one
+MAX_CONCURRENT_FETCHES = 20
+
+# Shared HTTP client, created lazily by _client()
+_CLIENT: httpx.AsyncClient | None = None
+
+# In-process copies of cache files: path -> (file mtime, parsed value)
+_MEM: dict[Path, tuple[float, Any]] = {}
+
+# Cache writes waiting to be flushed to disk: path -> content
+_PENDING_WRITES: dict[Path, str] = {}
+_FLUSH_DELAY_SECONDS = 2.0
+_FLUSH_TASK: asyncio.Task[None] | None = None
+_WRITING: asyncio.Future[None] | None = None
+
+# Converts the parsed content tree directly, without re-serializing it to HTML
+_MARKDOWN = MarkdownConverter(heading_style="ATX")
+
 # Collapse 3+ newlines into 2
 _EXCESS_NEWLINES = re.compile(r"\n{3,}")
 
+# d3js.org uses VitePress — content is in <main class="main">, with
+# div.vp-doc as a fallback. One strainer keeps both candidates so the page is
+# parsed once; it sees the raw class attribute, so match on class tokens.
+_CONTENT_STRAINER = SoupStrainer(
+    ["main", "div"], class_=re.compile(r"(?:^|\s)(?:main|vp-doc)(?:\s|$)")
+)
+
+
+def _client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use.
+
+    Reusing one client keeps connections to d3js.org and observablehq.com
+    alive, so cache misses skip the TCP + TLS handshake. HTTP/2 lets
+    concurrent fetches to one host share a single connection.
+    """
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            http2=True,
+            timeout=30,
+            limits=httpx.Limits(
+                max_connections=100, max_keepalive_connections=MAX_CONCURRENT_FETCHES
+            ),
+        )
+    return _CLIENT
+
+
+async def close_client() -> None:
+    """Close the shared HTTP client, if one was created."""
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
 
 def _cache_path(page: str) -> Path:
     """Map a page path like '/d3-scale/linear' to a cache file."""
@@ -23,32 +81,136 @@ def _cache_path(page: str) -> Path:
     return CACHE_DIR / f"{clean}.md"
 
 
-def _is_fresh(path: Path) -> bool:
-    if not path.exists():
-        return False
-    age = time.time() - path.stat().st_mtime
-    return age < CACHE_TTL_SECONDS
+def _fresh_mtime(path: Path) -> float | None:
+    """Return the file's mtime if it exists and is within the TTL, else None."""
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if time.time() - mtime >= CACHE_TTL_SECONDS:
+        return None
+    return mtime
+
+
+def _read_if_fresh(path: Path) -> tuple[str, float] | None:
+    mtime = _fresh_mtime(path)
+    if mtime is None:
+        return None
+    try:
+        return path.read_text(), mtime
+    except FileNotFoundError:
+        # Removed between the stat and the read
+        return None
+
+
+async def _read_fresh(path: Path) -> tuple[str, float] | None:
+    """Read a cache file within its TTL as (content, mtime), off the event loop."""
+    return await asyncio.to_thread(_read_if_fresh, path)
+
+
+def _mem_get(path: Path) -> Any | None:
+    """Return the in-memory copy of a cache file, or None if absent or stale.
+
+    Entries carry the file's mtime, so they expire with the file's TTL.
+    """
+    entry = _MEM.get(path)
+    if entry is None:
+        return None
+    mtime, value = entry
+    if time.time() - mtime >= CACHE_TTL_SECONDS:
+        del _MEM[path]
+        return None
+    return value
+
+
+def _mem_put(path: Path, value: Any, mtime: float | None = None) -> None:
+    """Remember a cache file's parsed value, stamped with its mtime."""
+    _MEM[path] = (time.time() if mtime is None else mtime, value)
+
+
+def _write_files(writes: dict[Path, str]) -> None:
+    for path, content in writes.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+async def _write_pending() -> None:
+    global _WRITING
+    if not _PENDING_WRITES:
+        return
+    writes = dict(_PENDING_WRITES)
+    _PENDING_WRITES.clear()
+    writing = asyncio.ensure_future(asyncio.to_thread(_write_files, writes))
+    _WRITING = writing
+    try:
+        # Shielded so cancelling the flush task leaves the batch running for
+        # flush_writes() to await, instead of dropping it mid-write
+        await asyncio.shield(writing)
+    finally:
+        if writing.done() and _WRITING is writing:
+            _WRITING = None
+
+
+async def _flush_later() -> None:
+    # Writes scheduled while a batch is being written see this task still
+    # running and don't start another, so keep going until nothing is queued
+    while _PENDING_WRITES:
+        await asyncio.sleep(_FLUSH_DELAY_SECONDS)
+        try:
+            await _write_pending()
+        except OSError:
+            # Nobody awaits this task; the values stay served from memory
+            logger.exception("Failed to write cache files")
+
+
+def _schedule_write(path: Path, content: str) -> None:
+    """Queue a cache file write, flushed in the background shortly after.
+
+    Repeated writes to the same path before a flush are coalesced. Callers
+    should _mem_put() the value so reads are served until it lands on disk.
+    """
+    global _FLUSH_TASK
+    _PENDING_WRITES[path] = content
+    if _FLUSH_TASK is None or _FLUSH_TASK.done():
+        _FLUSH_TASK = asyncio.create_task(_flush_later())
+
+
+async def flush_writes() -> None:
+    """Write all pending cache files to disk now."""
+    global _FLUSH_TASK, _WRITING
+    if _FLUSH_TASK is not None:
+        _FLUSH_TASK.cancel()
+        _FLUSH_TASK = None
+    writing, _WRITING = _WRITING, None
+    try:
+        if writing is not None:
+            # A batch the flush task already took off the queue
+            await writing
+    finally:
+        await _write_pending()
 
 
 def _html_to_markdown(html: str) -> str:
     """Extract the doc content from a d3js.org page and convert to markdown."""
-    soup = BeautifulSoup(html, "html.parser")
-
-    # d3js.org uses VitePress — content is in <main class="main">
-    main = soup.find("main", class_="main")
+    # Only build a tree for the content subtree, using the C-based lxml parser
+    content = BeautifulSoup(html, "lxml", parse_only=_CONTENT_STRAINER)
+    main = content.find("main", class_="main")
     if not main:
         # Fallback: try div.vp-doc
-        main = soup.find("div", class_="vp-doc")
+        main = content.find("div", class_="vp-doc")
     if not main:
         # Last resort: use the whole body
+        soup = BeautifulSoup(html, "lxml")
         main = soup.body or soup
 
     # Remove elements that shouldn't appear in docs
     for tag in main.find_all(["script", "style", "img"]):
         tag.decompose()
 
-    md = markdownify(str(main), heading_style="ATX")
-    return _EXCESS_NEWLINES.sub("\n\n", md).strip()
+    md = _MARKDOWN.convert_soup(main)
+    if "\n\n\n" in md:
+        md = _EXCESS_NEWLINES.sub("\n\n", md)
+    return md.strip()
 
 
 async def fetch_page(
@@ -63,8 +225,14 @@ async def fetch_page(
     """
     path = _cache_path(page)
 
-    if _is_fresh(path):
-        return path.read_text()
+    cached = _mem_get(path)
+    if cached is not None:
+        return cached
+
+    if stored := await _read_fresh(path):
+        content, mtime = stored
+        _mem_put(path, content, mtime)
+        return content
 
     url = f"{BASE_URL}{page}"
 
@@ -72,8 +240,7 @@ async def fetch_page(
         await ctx.info(f"Fetching {url}...")
 
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(url)
+        response = await _client().get(url)
     except httpx.TimeoutException as e:
         msg = f"Timeout fetching {url}"
         raise ToolError(msg) from e
@@ -87,10 +254,32 @@ async def fetch_page(
     response.raise_for_status()
 
     content = _html_to_markdown(response.text)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content)
+    _mem_put(path, content)
+    _schedule_write(path, content)
 
     if ctx:
         await ctx.info(f"Cached {page} ({len(content)} bytes)")
 
     return content
+
+
+async def fetch_pages(
+    pages: list[str],
+    ctx: Context | None = None,
+    *,
+    concurrency: int = MAX_CONCURRENT_FETCHES,
+) -> list[str]:
+    """Fetch several doc pages concurrently, returning them in order.
+
+    Args:
+        pages: Page paths like '/d3-scale/linear'.
+        ctx: Optional MCP context for logging.
+        concurrency: Maximum number of fetches in flight at once.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(page: str) -> str:
+        async with semaphore:
+            return await fetch_page(page, ctx)
+
+    return list(await asyncio.gather(*(fetch(page) for page in pages)))
@@ -1,14 +1,24 @@
 import json
 import re
-import time
+from bisect import bisect_right
+from collections import Counter
+from collections.abc import Iterator, Sequence
 from pathlib import Path
+from typing import Self
 
 import httpx
 from fastmcp.exceptions import ToolError
 from fastmcp.server.context import Context
-from pydantic import BaseModel
-
-from d3_mcp_server.cache import CACHE_DIR, CACHE_TTL_SECONDS
+from pydantic import BaseModel, TypeAdapter
+
+from d3_mcp_server.cache import (
+    CACHE_DIR,
+    _client,
+    _mem_get,
+    _mem_put,
+    _read_fresh,
+    _schedule_write,
+)
 from d3_mcp_server.search import _split_terms
 
 GALLERY_URL = "https://observablehq.com/@d3/gallery"
@@ -27,40 +37,100 @@ class D3Example(BaseModel):
     author: str
 
 
+# Validates and serializes the whole gallery cache in one pass in pydantic-core
+_GALLERY_ADAPTER = TypeAdapter(list[D3Example])
+
+
 # --- Gallery parsing ---
 
-# Matches previews([...]) blocks in the gallery page source
-_PREVIEWS_RE = re.compile(r"previews\(\[(.+?)\]\)", re.DOTALL)
+# Delimit the previews([...]) calls in the gallery page source
+_PREVIEWS_OPEN = "previews(["
+_PREVIEWS_CLOSE = "])"
+
+# previews() takes a JS array literal of objects with these bare keys; quoting
+# them turns the literal into JSON. A key name inside a string value would get
+# a stray quote, which leaves invalid JSON, so such blocks use the fallback.
+_PREVIEW_KEYS = ("path", "thumbnail", "title", "author")
+
+# Fallback for blocks that aren't valid JSON once converted. The gallery
+# embeds each cell's source as a JSON string, so inside previews() quotes
+# usually appear as \" and newlines as a literal \n. The escapes are optional
+# so plain blocks parse too; only the captured values are unescaped.
+_JS_WS = r"(?:\s|\\n)*"
+_JS_STR = r'\\?"((?:[^"\\]|\\[^"])+?)\\?"'
 
 # Matches individual example objects inside a previews() block
 _EXAMPLE_OBJ_RE = re.compile(
-    r"""\{\s*
-    path:\s*"([^"]+)",\s*
-    thumbnail:\s*"[^"]+",\s*
-    title:\s*"([^"]+)",\s*
-    author:\s*"([^"]+)"\s*
-    \}""",
+    rf"""\{{{_JS_WS}
+    path:{_JS_WS}{_JS_STR},{_JS_WS}
+    thumbnail:{_JS_WS}{_JS_STR},{_JS_WS}
+    title:{_JS_WS}{_JS_STR},{_JS_WS}
+    author:{_JS_WS}{_JS_STR}{_JS_WS}
+    \}}""",
     re.VERBOSE,
 )
 
+# Separator between cells in the gallery page's notebook JSON
+_CELL_SEPARATOR = '},{"id":'
+
 # Matches category name from the cell metadata
 _CATEGORY_NAME_RE = re.compile(r'"name"\s*:\s*"([^"]+)"')
 
 
+# JS string escapes handled by _unescape_js
+_JS_ESCAPE_RE = re.compile(r'\\[n"\\]')
+_JS_ESCAPES = {"\\n": "\n", '\\"': '"', "\\\\": "\\"}
+
+
 def _unescape_js(s: str) -> str:
-    """Unescape JS string escapes (\\n, \\", etc.)."""
-    return s.replace("\\n", "\n").replace('\\"', '"').replace("\\\\", "\\")
+    """Unescape JS string escapes (\\n, \\", etc.) in a single pass."""
+    return _JS_ESCAPE_RE.sub(lambda m: _JS_ESCAPES[m.group()], s)
+
+
+def _previews_blocks(chunk: str) -> Iterator[str]:
+    """Yield the raw argument of each previews([...]) call in a cell chunk."""
+    pos = chunk.find(_PREVIEWS_OPEN)
+    while pos != -1:
+        start = pos + len(_PREVIEWS_OPEN)
+        end = chunk.find(_PREVIEWS_CLOSE, start + 1)
+        if end == -1:
+            return
+        yield chunk[start:end]
+        pos = chunk.find(_PREVIEWS_OPEN, end + len(_PREVIEWS_CLOSE))
+
+
+def _parse_previews(block: str) -> list[tuple[str, str, str]] | None:
+    """Parse a raw previews() block into (path, title, author) rows.
+
+    Returns None if the block isn't a plain object literal array.
+    """
+    try:
+        # The block is still escaped as part of the cell's JSON string
+        source = json.loads(f'"{block}"').rstrip().removesuffix(",")
+        for key in _PREVIEW_KEYS:
+            source = source.replace(f"{key}:", f'"{key}":')
+        items = json.loads(f"[{source}]")
+    except ValueError:
+        return None
+
+    rows: list[tuple[str, str, str]] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        path, title, author = item.get("path"), item.get("title"), item.get("author")
+        if isinstance(path, str) and isinstance(title, str) and isinstance(author, str):
+            rows.append((path, title, author))
+    return rows
 
 
 def parse_gallery(html: str) -> list[D3Example]:
     """Parse the Observable gallery page into a list of D3Examples."""
-    unescaped = _unescape_js(html)
     examples: list[D3Example] = []
 
     # Split by cell boundaries to associate categories with previews
     # The gallery page has cells like: "name":"animation" followed by previews([...])
-    # We split on the cell separator pattern and process each chunk
-    chunks = re.split(r'\},\{"id":', unescaped)
+    # We split on the cell separator and process each chunk
+    chunks = html.split(_CELL_SEPARATOR)
 
     for chunk in chunks:
         # Find the category name for this chunk
@@ -68,18 +138,19 @@ def parse_gallery(html: str) -> list[D3Example]:
         category = cat_match.group(1).capitalize() if cat_match else ""
 
         # Find all previews blocks in this chunk
-        for previews_match in _PREVIEWS_RE.finditer(chunk):
-            block = previews_match.group(1)
-            for obj_match in _EXAMPLE_OBJ_RE.finditer(block):
-                path, title, author = obj_match.groups()
-                examples.append(
-                    D3Example(
-                        path=path,
-                        title=title,
-                        category=category,
-                        author=author,
+        for block in _previews_blocks(chunk):
+            rows = _parse_previews(block)
+            if rows is None:
+                rows = [
+                    (_unescape_js(path), _unescape_js(title), _unescape_js(author))
+                    for path, _thumbnail, title, author in (
+                        m.groups() for m in _EXAMPLE_OBJ_RE.finditer(block)
                     )
-                )
+                ]
+            examples.extend(
+                D3Example(path=path, title=title, category=category, author=author)
+                for path, title, author in rows
+            )
 
     return examples
 
@@ -89,18 +160,21 @@ async def fetch_gallery(ctx: Context | None = None) -> list[D3Example]:
 
     Results are cached to disk with 24h TTL.
     """
-    if _GALLERY_CACHE.exists():
-        age = time.time() - _GALLERY_CACHE.stat().st_mtime
-        if age < CACHE_TTL_SECONDS:
-            data = json.loads(_GALLERY_CACHE.read_text())
-            return [D3Example(**item) for item in data]
+    cached = _mem_get(_GALLERY_CACHE)
+    if cached is not None:
+        return cached
+
+    if stored := await _read_fresh(_GALLERY_CACHE):
+        text, mtime = stored
+        examples = _GALLERY_ADAPTER.validate_json(text)
+        _mem_put(_GALLERY_CACHE, examples, mtime)
+        return examples
 
     if ctx:
         await ctx.info(f"Fetching {GALLERY_URL}...")
 
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(GALLERY_URL)
+        response = await _client().get(GALLERY_URL)
     except httpx.TimeoutException as e:
         msg = f"Timeout fetching {GALLERY_URL}"
         raise ToolError(msg) from e
@@ -117,8 +191,8 @@ async def fetch_gallery(ctx: Context | None = None) -> list[D3Example]:
         msg = "No examples found in gallery page"
         raise ToolError(msg)
 
-    _GALLERY_CACHE.parent.mkdir(parents=True, exist_ok=True)
-    _GALLERY_CACHE.write_text(json.dumps([e.model_dump() for e in examples]))
+    _mem_put(_GALLERY_CACHE, examples)
+    _schedule_write(_GALLERY_CACHE, _GALLERY_ADAPTER.dump_json(examples).decode())
 
     if ctx:
         await ctx.info(f"Cached {len(examples)} examples")
@@ -128,54 +202,127 @@ async def fetch_gallery(ctx: Context | None = None) -> list[D3Example]:
 
 # --- Example scoring ---
 
+# Separates fields in the substring-search blobs; never part of a query term
+_BLOB_SEP = "\0"
+
+
+def _join_blob(fields: list[str]) -> tuple[str, list[int]]:
+    """Join fields into one searchable string plus each field's start offset."""
+    starts: list[int] = []
+    offset = 0
+    for field in fields:
+        starts.append(offset)
+        offset += len(field) + len(_BLOB_SEP)
+    return _BLOB_SEP.join(fields), starts
+
+
+def _blob_hits(blob: str, starts: list[int], term: str) -> Iterator[int]:
+    """Yield the index of each field in the blob that contains term, once."""
+    if _BLOB_SEP in term:
+        return
+    pos = blob.find(term)
+    while pos != -1:
+        i = bisect_right(starts, pos) - 1
+        yield i
+        if i + 1 == len(starts):
+            return
+        pos = blob.find(term, starts[i + 1])
+
+
+class _ExampleIndex(BaseModel):
+    """Lookup tables for scoring a gallery without rescanning every example."""
+
+    title_words: dict[str, set[int]]
+    categories: dict[str, list[int]]
+    category_counts: dict[str, int]
+    title_blob: str
+    title_starts: list[int]
+    path_blob: str
+    path_starts: list[int]
+
+    @classmethod
+    def build(cls, examples: Sequence[D3Example]) -> Self:
+        title_words: dict[str, set[int]] = {}
+        categories: dict[str, list[int]] = {}
+        titles: list[str] = []
+        paths: list[str] = []
+        for i, example in enumerate(examples):
+            title_lower = example.title.lower()
+            for word in title_lower.split():
+                title_words.setdefault(word, set()).add(i)
+            categories.setdefault(example.category.lower(), []).append(i)
+            titles.append(title_lower)
+            paths.append(example.path.lower())
+
+        title_blob, title_starts = _join_blob(titles)
+        path_blob, path_starts = _join_blob(paths)
+        counts = Counter(example.category for example in examples)
+        return cls(
+            title_words=title_words,
+            categories=categories,
+            category_counts=dict(sorted(counts.items())),
+            title_blob=title_blob,
+            title_starts=title_starts,
+            path_blob=path_blob,
+            path_starts=path_starts,
+        )
+
+
+# Index for the most recently scored example list. The list is held so its
+# identity check stays valid; a refreshed gallery is a new list and rebuilds.
+_INDEX: tuple[Sequence[D3Example], _ExampleIndex] | None = None
+
+
+def _example_index(examples: Sequence[D3Example]) -> _ExampleIndex:
+    global _INDEX
+    if _INDEX is None or _INDEX[0] is not examples:
+        _INDEX = (examples, _ExampleIndex.build(examples))
+    return _INDEX[1]
+
+
+def category_counts(examples: Sequence[D3Example]) -> dict[str, int]:
+    """Return the number of examples per category, ordered by category name."""
+    return _example_index(examples).category_counts
+
+
+def examples_in_category(
+    examples: Sequence[D3Example], category: str
+) -> list[D3Example]:
+    """Return the examples whose category matches case-insensitively."""
+    matches = _example_index(examples).categories.get(category.lower(), ())
+    return [examples[i] for i in matches]
+
 
 def score_examples(
-    query: str, examples: list[D3Example]
+    query: str, examples: Sequence[D3Example]
 ) -> list[tuple[D3Example, int]]:
     """Score examples against a search query.
 
     Returns (example, score) pairs sorted by score descending.
     Weights: title word (10), category (3), path keyword (1).
     """
-    terms = _split_terms(query)
-    results: list[tuple[D3Example, int]] = []
-
-    for example in examples:
-        score = 0
-        title_lower = example.title.lower()
-        title_words = title_lower.split()
-        category_lower = example.category.lower()
-        path_lower = example.path.lower()
-
-        for term in terms:
-            if term in title_words:
-                score += 10
-            elif term in title_lower:
-                score += 5
-            if term == category_lower:
-                score += 3
-            if term in path_lower:
-                score += 1
+    index = _example_index(examples)
+    scores: Counter[int] = Counter()
 
-        if score > 0:
-            results.append((example, score))
+    for term in _split_terms(query):
+        word_hits = index.title_words.get(term, ())
+        for i in _blob_hits(index.title_blob, index.title_starts, term):
+            scores[i] += 10 if i in word_hits else 5
+        for i in index.categories.get(term, ()):
+            scores[i] += 3
+        for i in _blob_hits(index.path_blob, index.path_starts, term):
+            scores[i] += 1
 
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results
+    ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+    return [(examples[i], score) for i, score in ranked]
 
 
 # --- Notebook code extraction ---
 
-# Matches named function cells: function _chart(d3,data) { ... }
-# or function _data(FileAttachment) { ... }
+# Matches named function cells, plain or async: function _chart(d3,data) { ... }
+# or async function _data(FileAttachment) { ... }
 _FUNC_CELL_RE = re.compile(
-    r"^function\s+(_?\w+)\(([^)]*)\)\s*\{",
-    re.MULTILINE,
-)
-
-# Matches async function cells
-_ASYNC_FUNC_CELL_RE = re.compile(
-    r"^async\s+function\s+(_?\w+)\(([^)]*)\)\s*\{",
+    r"^(async\s+)?function\s+(_?\w+)\(([^)]*)\)\s*\{",
     re.MULTILINE,
 )
 
@@ -191,66 +338,91 @@ _MD_CELL_ARROW_RE = re.compile(
     re.DOTALL,
 )
 
-# Matches FileAttachment mappings in define()
-_FILE_ATTACHMENT_RE = re.compile(
-    r'\["([^"]+)",\s*\{url:\s*"([^"]+)"(?:,\s*mimeType:\s*"([^"]+)")?\}]'
-)
+# Start of the define() function that wires up cells at the end of a notebook
+_DEFINE_SECTION_MARKER = "export default function define("
+
+
+# Positions that can change brace depth: braces, string openers, comments
+_BODY_TOKEN_RE = re.compile(r"""[{}"'`]|//|/\*""")
+
+# Rest of a string literal after its opening quote, up to the closing quote
+_STRING_TAIL_RES = {
+    q: re.compile(rf"[^\\{q}]*(?:\\.[^\\{q}]*)*{q}", re.DOTALL) for q in "\"'`"
+}
+
+
+def _define_section(source: str) -> str:
+    """Return the notebook's trailing define() function, or all of source."""
+    start = source.rfind(_DEFINE_SECTION_MARKER)
+    return source[start:] if start != -1 else source
 
 
 def _extract_function_body(source: str, start: int) -> str:
     """Extract a function body given the position after the opening brace."""
     depth = 1
-    i = start
-    while i < len(source) and depth > 0:
-        ch = source[i]
-        if ch == "{":
+    pos = start
+    while match := _BODY_TOKEN_RE.search(source, pos):
+        lexeme = match.group()
+        pos = match.end()
+        if lexeme == "{":
             depth += 1
-        elif ch == "}":
+        elif lexeme == "}":
             depth -= 1
-        elif ch in ('"', "'", "`"):
-            # Skip string literals
-            quote = ch
-            i += 1
-            while i < len(source):
-                if source[i] == "\\" and i + 1 < len(source):
-                    i += 2
-                    continue
-                if source[i] == quote:
-                    break
-                i += 1
-        elif ch == "/" and i + 1 < len(source):
-            next_ch = source[i + 1]
-            if next_ch == "/":
-                # Skip single-line comment
-                while i < len(source) and source[i] != "\n":
-                    i += 1
-            elif next_ch == "*":
-                # Skip block comment
-                i += 2
-                while i + 1 < len(source) and not (
-                    source[i] == "*" and source[i + 1] == "/"
-                ):
-                    i += 1
-                i += 1  # skip past /
-        i += 1
-    return source[start : i - 1].strip() if depth == 0 else ""
-
-
-def _extract_cell(source: str, name: str) -> tuple[str, str, str] | None:
+            if depth == 0:
+                return source[start : match.start()].strip()
+        elif lexeme == "//":
+            pos = source.find("\n", pos)
+        elif lexeme == "/*":
+            pos = source.find("*/", pos)
+            if pos != -1:
+                pos += 2
+        else:
+            string_end = _STRING_TAIL_RES[lexeme].match(source, pos)
+            pos = string_end.end() if string_end else -1
+        if pos == -1:
+            break
+    return ""
+
+
+def _index_cells(source: str) -> dict[str, tuple[str, int, bool]]:
+    """Map each function cell name to (params, body offset, is_async).
+
+    The first definition of a name wins, and async cells take precedence
+    over plain ones.
+    """
+    cells: dict[str, tuple[str, int, bool]] = {}
+    for match in _FUNC_CELL_RE.finditer(source):
+        is_async = match.group(1) is not None
+        name = match.group(2)
+        seen = cells.get(name)
+        if seen is None or (is_async and not seen[2]):
+            cells[name] = (match.group(3).strip(), match.end(), is_async)
+    return cells
+
+
+def _extract_cell(
+    source: str, cells: dict[str, tuple[str, int, bool]], name: str
+) -> tuple[str, str, str] | None:
     """Extract a named cell's parameters and body.
 
     Returns (name, params, body) or None if not found.
     """
-    for pattern in (_ASYNC_FUNC_CELL_RE, _FUNC_CELL_RE):
-        for match in pattern.finditer(source):
-            if match.group(1) == name:
-                params = match.group(2).strip()
-                brace_end = match.end()
-                body = _extract_function_body(source, brace_end)
-                is_async = pattern is _ASYNC_FUNC_CELL_RE
-                prefix = "async " if is_async else ""
-                return name, params, f"{prefix}{body}"
-    return None
+    cell = cells.get(name)
+    if cell is None:
+        return None
+    params, brace_end, is_async = cell
+    body = _extract_function_body(source, brace_end)
+    prefix = "async " if is_async else ""
+    return name, params, f"{prefix}{body}"
+
+
+# Cleanup patterns applied to the description md cell
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_MD_LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]+\)")
+_MD_EMPHASIS_RE = re.compile(r"[*_]+([^*_]+)[*_]+")
+_WS_RE = re.compile(r"\s+")
+_BREADCRUMB_RE = re.compile(r"^.*?D3\s*\u203a\s*Gallery\s*")
+_HEADING_RE = re.compile(r"^#\s+\S[^#]*?\s+")
 
 
 def _extract_description(source: str) -> str:
@@ -260,60 +432,103 @@ def _extract_description(source: str) -> str:
         if match:
             md_content = match.group(1)
             # Strip HTML tags
-            text = re.sub(r"<[^>]+>", "", md_content)
+            text = _HTML_TAG_RE.sub("", md_content)
             # Strip markdown links but keep text
-            text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
+            text = _MD_LINK_RE.sub(r"\1", text)
             # Strip markdown emphasis
-            text = re.sub(r"[*_]+([^*_]+)[*_]+", r"\1", text)
+            text = _MD_EMPHASIS_RE.sub(r"\1", text)
             # Collapse whitespace
-            text = re.sub(r"\s+", " ", text).strip()
+            text = _WS_RE.sub(" ", text).strip()
             # Remove the breadcrumb header (D3 > Gallery) and hidden h1
-            text = re.sub(r"^.*?D3\s*\u203a\s*Gallery\s*", "", text)
+            text = _BREADCRUMB_RE.sub("", text)
             # Remove leading markdown heading (# Title)
-            text = re.sub(r"^#\s+\S[^#]*?\s+", "", text, count=1)
+            text = _HEADING_RE.sub("", text, count=1)
             return text.strip()
     return ""
 
 
-def _extract_file_attachments(source: str) -> dict[str, str]:
-    """Extract FileAttachment name -> URL mappings from define()."""
+class _DefineWiring(BaseModel):
+    """What a notebook's define() section wires up, gathered in one scan."""
+
     attachments: dict[str, str] = {}
-    for match in _FILE_ATTACHMENT_RE.finditer(source):
-        name, url, _mime = match.groups()
-        attachments[name] = url
-    return attachments
+    chart_deps: list[str] = []
+    imports: dict[str, str] = {}
 
 
-def _find_chart_dependencies(source: str) -> list[str]:
-    """Find what the _chart cell depends on from the define() section."""
-    # Match: .define("chart", ["d3","data",...], _chart)
-    define_match = re.search(r'\.define\("chart",\s*\[([^\]]*)\],\s*_chart\)', source)
-    if define_match:
-        deps_str = define_match.group(1)
-        return [d.strip().strip('"') for d in deps_str.split(",") if d.strip()]
-    return []
+OBSERVABLE_BASE_URL = "https://observablehq.com"
 
+# One alternative per kind of define() wiring, so the section is scanned once
+# and each match is dispatched on its outer group name
+_DEFINE_WIRING_RE = re.compile(
+    r"""
+    # FileAttachment mapping: ["name", {url: "...", mimeType: "..."}]
+    (?P<attachment>
+      \["(?P<attach_name>[^"]+)",\s*\{url:\s*"(?P<attach_url>[^"]+)"
+      (?:,\s*mimeType:\s*"[^"]+")?\}]
+    )
+    # Chart cell definition: .define("chart", ["d3","data",...], _chart)
+    | (?P<chart>
+      \.define\("chart",\s*\[(?P<chart_deps>[^\]]*)\],\s*_chart\)
+    )
+    # Module import definition: .define("module 1", ... import("/@d3/x.js
+    | (?P<module>
+      \.define\("(?P<module_var>module\ \d+)".*?import\("(?P<module_path>/[^"?]+)
+    )
+    # Helper import referencing a module variable
+    | (?P<helper>
+      \.define\("(?P<helper_name>\w+)",\s*\["(?P<helper_module>module\ \d+)"
+      .*?\.import\("\w+"
+    )
+    """,
+    re.VERBOSE,
+)
 
-def _find_named_cells(source: str) -> list[str]:
-    """Find all named (non-underscore-prefixed) cell names from define()."""
-    # Pattern: main.variable(observer("name")).define("name", ...)
-    names: list[str] = []
-    for match in re.finditer(r'observer\("(\w+)"\)\)\.define\("(\w+)"', source):
-        name = match.group(1)
-        if name not in ("chart",) and not name.startswith("_"):
-            names.append(name)
-    return names
 
+def _scan_define_wiring(source: str) -> _DefineWiring:
+    """Collect attachments, chart dependencies and imports from define()."""
+    wiring = _DefineWiring()
+    chart_deps: str | None = None
+    module_paths: dict[str, str] = {}
+    helpers: list[tuple[str, str]] = []
+
+    for match in _DEFINE_WIRING_RE.finditer(source):
+        kind = match.lastgroup
+        if kind == "attachment":
+            wiring.attachments[match["attach_name"]] = match["attach_url"]
+        elif kind == "chart":
+            if chart_deps is None:
+                chart_deps = match["chart_deps"]
+        elif kind == "module":
+            # "/d3/color-legend.js" → "/@d3/color-legend"
+            clean = match["module_path"].removesuffix(".js")
+            if not clean.startswith("/@"):
+                clean = f"/@{clean.lstrip('/')}"
+            module_paths[match["module_var"]] = clean
+        else:
+            helpers.append((match["helper_name"], match["helper_module"]))
+
+    if chart_deps is not None:
+        wiring.chart_deps = [
+            d.strip().strip('"') for d in chart_deps.split(",") if d.strip()
+        ]
 
-# Matches module import definitions in define() section
-_MODULE_IMPORT_RE = re.compile(r'\.define\("(module \d+)".*?import\("(/[^"?]+)')
+    # Map imported names to their source notebook
+    for defined_name, module_var in helpers:
+        if module_var in module_paths:
+            notebook_path = module_paths[module_var]
+            wiring.imports[defined_name] = f"{OBSERVABLE_BASE_URL}{notebook_path}"
 
-# Matches helper imports that reference a module variable
-_HELPER_IMPORT_RE = re.compile(
-    r'\.define\("(\w+)",\s*\["(module \d+)".*?\.import\("(\w+)"'
-)
+    return wiring
 
-OBSERVABLE_BASE_URL = "https://observablehq.com"
+
+def _extract_file_attachments(source: str) -> dict[str, str]:
+    """Extract FileAttachment name -> URL mappings from define()."""
+    return _scan_define_wiring(source).attachments
+
+
+def _find_chart_dependencies(source: str) -> list[str]:
+    """Find what the _chart cell depends on from the define() section."""
+    return _scan_define_wiring(source).chart_deps
 
 
 def _extract_imports(source: str) -> dict[str, str]:
@@ -322,25 +537,26 @@ def _extract_imports(source: str) -> dict[str, str]:
     Returns {helper_name: observable_url}, e.g.
     {"Legend": "https://observablehq.com/@d3/color-legend"}
     """
-    # Build module variable → notebook path map
-    module_paths: dict[str, str] = {}
-    for match in _MODULE_IMPORT_RE.finditer(source):
-        module_var, path = match.groups()
-        # "/d3/color-legend.js" → "/@d3/color-legend"
-        clean = re.sub(r"\.js$", "", path)
-        if not clean.startswith("/@"):
-            clean = f"/@{clean.lstrip('/')}"
-        module_paths[module_var] = clean
+    return _scan_define_wiring(source).imports
+
+
+# Matches observed cells: main.variable(observer("name")).define("name", ...)
+_OBSERVER_DEFINE_RE = re.compile(r'observer\("(\w+)"\)\)\.define\("(\w+)"')
 
-    # Map imported names to their source notebook
-    imports: dict[str, str] = {}
-    for match in _HELPER_IMPORT_RE.finditer(source):
-        defined_name, module_var, _imported_name = match.groups()
-        if module_var in module_paths:
-            notebook_path = module_paths[module_var]
-            imports[defined_name] = f"{OBSERVABLE_BASE_URL}{notebook_path}"
 
-    return imports
+def _find_named_cells(source: str) -> list[str]:
+    """Find all named (non-underscore-prefixed) cell names from define()."""
+    names: list[str] = []
+    for match in _OBSERVER_DEFINE_RE.finditer(source):
+        name = match.group(1)
+        if name not in ("chart",) and not name.startswith("_"):
+            names.append(name)
+    return names
+
+
+# Strip the Observable `return( ... )` wrapper from data cell bodies
+_RETURN_OPEN_RE = re.compile(r"^return\(\s*\n?")
+_RETURN_CLOSE_RE = re.compile(r"\s*\)$")
 
 
 def extract_notebook_code(source: str) -> str:
@@ -356,13 +572,16 @@ def extract_notebook_code(source: str) -> str:
         parts.append(description)
 
     # 2. Extract file attachments (data URLs)
-    attachments = _extract_file_attachments(source)
+    # These patterns describe the define() wiring, so only scan that section
+    wiring = _scan_define_wiring(_define_section(source))
+    attachments = wiring.attachments
 
     # 3. Extract chart dependencies to find helper cells
-    chart_deps = _find_chart_dependencies(source)
+    chart_deps = wiring.chart_deps
 
     # 4. Extract helper data cells (like _data, _us)
     # and named helper cells that the chart depends on
+    cells = _index_cells(source)
     helper_code: list[str] = []
 
     # Find data-loading cells
@@ -370,7 +589,7 @@ def extract_notebook_code(source: str) -> str:
         if dep in ("d3", "invalidation", "width", "height", "topojson", "DOM"):
             continue
         # Check if there's a function cell for this dependency
-        cell = _extract_cell(source, f"_{dep}")
+        cell = _extract_cell(source, cells, f"_{dep}")
         if cell:
             _, params, body = cell
             if "FileAttachment" in params and attachments:
@@ -379,12 +598,12 @@ def extract_notebook_code(source: str) -> str:
                 # Clean the body from Observable patterns
                 clean = body.strip()
                 if clean.startswith("return(\n") or clean.startswith("return("):
-                    clean = re.sub(r"^return\(\s*\n?", "", clean)
-                    clean = re.sub(r"\s*\)$", "", clean)
+                    clean = _RETURN_OPEN_RE.sub("", clean)
+                    clean = _RETURN_CLOSE_RE.sub("", clean)
                 helper_code.append(f"// {clean}")
 
     # 5. Extract the main chart function
-    chart_cell = _extract_cell(source, "_chart")
+    chart_cell = _extract_cell(source, cells, "_chart")
     if not chart_cell:
         return "No chart code found in this notebook."
 
@@ -411,7 +630,7 @@ def extract_notebook_code(source: str) -> str:
     parts.append(f"```js\n{code}\n```")
 
     # 7. Add imported helpers
-    imports = _extract_imports(source)
+    imports = wiring.imports
     if imports:
         parts.append("**Imported helpers:**")
         for name, url in imports.items():
@@ -444,10 +663,14 @@ async def fetch_notebook(path: str, ctx: Context | None = None) -> str:
     """
     cache_path = _example_cache_path(path)
 
-    if cache_path.exists():
-        age = time.time() - cache_path.stat().st_mtime
-        if age < CACHE_TTL_SECONDS:
-            return cache_path.read_text()
+    cached = _mem_get(cache_path)
+    if cached is not None:
+        return cached
+
+    if stored := await _read_fresh(cache_path):
+        content, mtime = stored
+        _mem_put(cache_path, content, mtime)
+        return content
 
     url = f"{NOTEBOOK_API_URL}/{path}.js?v=4"
 
@@ -455,8 +678,7 @@ async def fetch_notebook(path: str, ctx: Context | None = None) -> str:
         await ctx.info(f"Fetching {url}...")
 
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(url)
+        response = await _client().get(url)
     except httpx.TimeoutException as e:
         msg = f"Timeout fetching notebook: {path}"
         raise ToolError(msg) from e
@@ -471,8 +693,8 @@ async def fetch_notebook(path: str, ctx: Context | None = None) -> str:
 
     content = extract_notebook_code(response.text)
 
-    cache_path.parent.mkdir(parents=True, exist_ok=True)
-    cache_path.write_text(content)
+    _mem_put(cache_path, content)
+    _schedule_write(cache_path, content)
 
     if ctx:
         await ctx.info(f"Cached example {path}")
@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+import sys
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from pydantic import BaseModel, ConfigDict
 
 BASE_URL = "https://d3js.org"
 
@@ -6,6 +10,8 @@ BASE_URL = "https://d3js.org"
 class D3Module(BaseModel):
     """A D3.js module with its doc pages on d3js.org."""
 
+    model_config = ConfigDict(frozen=True)
+
     name: str
     description: str
     tags: list[str]
@@ -306,13 +312,25 @@ D3_MODULES: list[D3Module] = [
     ),
 ]
 
-D3_MODULE_MAP: dict[str, D3Module] = {m.name: m for m in D3_MODULES}
+D3_MODULE_MAP: Mapping[str, D3Module] = MappingProxyType(
+    {m.name: m for m in D3_MODULES}
+)
 
 # Also index by page path for direct page lookups
-D3_PAGE_MAP: dict[str, D3Module] = {}
-for _m in D3_MODULES:
-    for _p in _m.pages:
-        D3_PAGE_MAP[_p] = _m
+D3_PAGE_MAP: Mapping[str, D3Module] = MappingProxyType(
+    {sys.intern(p): m for m in D3_MODULES for p in m.pages}
+)
+
+# Accepted spellings -> canonical form, so each resolve is a single lookup.
+# Canonical names are merged last so they win over a clashing short form.
+_MODULE_ALIASES: Mapping[str, str] = MappingProxyType(
+    {name.removeprefix("d3-"): name for name in D3_MODULE_MAP}
+    | {name: name for name in D3_MODULE_MAP}
+)
+_PAGE_ALIASES: Mapping[str, str] = MappingProxyType(
+    {path.removeprefix("/"): path for path in D3_PAGE_MAP}
+    | {path: path for path in D3_PAGE_MAP}
+)
 
 
 def resolve_module_name(name: str) -> str | None:
@@ -321,13 +339,7 @@ def resolve_module_name(name: str) -> str | None:
     Accepts "d3-scale", "scale", "D3-Scale", etc.
     Returns the canonical name or None if not found.
     """
-    name = name.strip().lower()
-    if name in D3_MODULE_MAP:
-        return name
-    prefixed = f"d3-{name}"
-    if prefixed in D3_MODULE_MAP:
-        return prefixed
-    return None
+    return _MODULE_ALIASES.get(name.strip().lower())
 
 
 def resolve_page_path(path: str) -> str | None:
@@ -335,9 +347,4 @@ def resolve_page_path(path: str) -> str | None:
 
     Returns the canonical path (with leading /) or None.
     """
-    path = path.strip().lower()
-    if not path.startswith("/"):
-        path = f"/{path}"
-    if path in D3_PAGE_MAP:
-        return path
-    return None
+    return _PAGE_ALIASES.get(path.strip().lower())
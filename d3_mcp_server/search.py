@@ -1,75 +1,149 @@
+import heapq
 import re
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from functools import cached_property, lru_cache
+from operator import itemgetter
+from typing import Any, Self
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from d3_mcp_server.modules import D3Module
 
-# Split on camelCase boundaries: "scaleLinear" → ["scale", "Linear"]
-_CAMEL_RE = re.compile(r"[a-z]+|[A-Z][a-z]*")
+# Split on camelCase boundaries: "scaleLinear" → ["scale", "Linear"].
+# An acronym stays whole ("SVGPath" → ["SVG", "Path"]) and digits stay
+# attached to their word, uppercase or not ("d3-geo" → ["d3", "geo"],
+# "D3" → ["D3"], "3D" → ["3D"]).
+_CAMEL_RE = re.compile(r"[0-9]*[A-Z]+[0-9]*(?![a-z])|[A-Z]?[a-z0-9]+")
 
 
-def _split_terms(query: str) -> list[str]:
+@lru_cache(maxsize=256)
+def _split_terms(query: str) -> tuple[str, ...]:
     """Split query into lowercase terms, decomposing camelCase.
 
-    "scaleLinear" → ["scale", "linear", "scalelinear"]
-    "bar chart"   → ["bar", "chart"]
+    "scaleLinear" → ("scale", "linear", "scalelinear")
+    "geoSVGPath"  → ("geo", "svg", "path", "geosvgpath")
+    "bar chart"   → ("bar", "chart")
+
+    Cached, since clients often repeat a query.
     """
     words: list[str] = []
     for token in query.split():
-        parts = [p.lower() for p in _CAMEL_RE.findall(token)]
+        # Case marks the camelCase boundaries, so split before lowercasing
+        parts = _CAMEL_RE.findall(token)
         if len(parts) > 1:
-            words.extend(parts)
-            words.append(token.lower())
-        else:
-            words.append(token.lower())
-    return words
-
-
-def score_modules(query: str, modules: list[D3Module]) -> list[tuple[D3Module, int]]:
+            words.extend(part.lower() for part in parts)
+        words.append(token.lower())
+    return tuple(words)
+
+
+class _ModuleIndex(BaseModel):
+    """Lookup tables for scoring modules without rescanning every module."""
+
+    names: dict[str, set[int]]
+    tags: dict[str, set[int]]
+    desc_words: dict[str, set[int]]
+    tag_parts: dict[str, set[int]]
+
+    @classmethod
+    def build(cls, modules: Sequence[D3Module]) -> Self:
+        names: dict[str, set[int]] = {}
+        tags: dict[str, set[int]] = {}
+        desc_words: dict[str, set[int]] = {}
+        tag_parts: dict[str, set[int]] = {}
+        for i, module in enumerate(modules):
+            name_lower = module.name.lower()
+            for name in (name_lower, name_lower.removeprefix("d3-")):
+                names.setdefault(name, set()).add(i)
+            tags_lower = [t.lower() for t in module.tags]
+            for tag in tags_lower:
+                tags.setdefault(tag, set()).add(i)
+                # Every substring, so a partial tag match is one lookup
+                for start in range(len(tag)):
+                    for end in range(start + 1, len(tag) + 1):
+                        tag_parts.setdefault(tag[start:end], set()).add(i)
+            for word in module.description.lower().split():
+                desc_words.setdefault(word, set()).add(i)
+        return cls(names=names, tags=tags, desc_words=desc_words, tag_parts=tag_parts)
+
+
+# Index for the most recently scored module list, rebuilt if a different
+# list is passed; the server always scores the static D3_MODULES.
+_INDEX: tuple[Sequence[D3Module], _ModuleIndex] | None = None
+
+
+def _module_index(modules: Sequence[D3Module]) -> _ModuleIndex:
+    global _INDEX
+    if _INDEX is None or _INDEX[0] is not modules:
+        _INDEX = (modules, _ModuleIndex.build(modules))
+    return _INDEX[1]
+
+
+def score_modules(
+    query: str, modules: Sequence[D3Module]
+) -> list[tuple[D3Module, int]]:
     """Score modules against a search query.
 
     Returns (module, score) pairs sorted by score descending.
     Weights: name (10), exact tag (3), description word (2),
     partial tag (1).
     """
-    terms = _split_terms(query)
-    results: list[tuple[D3Module, int]] = []
+    index = _module_index(modules)
+    scores: Counter[int] = Counter()
 
-    for module in modules:
-        score = 0
-        name_lower = module.name.lower()
-        short_name = name_lower.removeprefix("d3-")
-        desc_words = module.description.lower().split()
-        tags_lower = [t.lower() for t in module.tags]
+    for term in _split_terms(query):
+        for i in index.names.get(term, ()):
+            scores[i] += 10
+        for i in index.tags.get(term, ()):
+            scores[i] += 3
+        for i in index.desc_words.get(term, ()):
+            scores[i] += 2
+        for i in index.tag_parts.get(term, ()):
+            scores[i] += 1
 
-        for term in terms:
-            if term in (name_lower, short_name):
-                score += 10
-            if term in tags_lower:
-                score += 3
-            if term in desc_words:
-                score += 2
-            if any(term in tag for tag in tags_lower):
-                score += 1
-
-        if score > 0:
-            results.append((module, score))
-
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results
-
-
-# HTML anchor pattern used in D3 READMEs for individual API methods
-_ANCHOR_RE = re.compile(
-    r'<a\s+(?:[^>]*?\s+)?(?:name|id)\s*=\s*["\']([^"\']+)["\']',
-    re.IGNORECASE,
-)
+    ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+    return [(modules[i], score) for i, score in ranked]
 
 
 class Section(BaseModel):
+    # Frozen so the cached lowercase fields can't go stale
+    model_config = ConfigDict(frozen=True)
+
     heading: str
     content: str
 
+    # Lowercased once per section; cached sections are searched repeatedly
+    @cached_property
+    def heading_lower(self) -> str:
+        return self.heading.lower()
+
+    @cached_property
+    def content_lower(self) -> str:
+        return self.content.lower()
+
+    def model_copy(
+        self, *, update: Mapping[str, Any] | None = None, deep: bool = False
+    ) -> Self:
+        # The copy starts from this section's __dict__, cached values included
+        copy = super().model_copy(update=update, deep=deep)
+        if update:
+            copy.__dict__.pop("heading_lower", None)
+            copy.__dict__.pop("content_lower", None)
+        return copy
+
+
+# A section starts at a line holding a ## or ### heading, or failing that an
+# HTML anchor (used in D3 READMEs for individual API methods). Both patterns
+# are kept within one line, so one finditer over the document finds them all.
+_SECTION_START_RE = re.compile(
+    r"""^(?:
+        \#{2,3}[^\S\n]+(?P<heading>.+)
+        |[^\n]*?<a[^\S\n]+(?:[^>\n]*?[^\S\n]+)?(?:name|id)[^\S\n]*=[^\S\n]*
+            ["'](?P<anchor>[^"'\n]+)["']
+    )""",
+    re.MULTILINE | re.IGNORECASE | re.VERBOSE,
+)
+
 
 def parse_sections(markdown: str) -> list[Section]:
     """Parse a D3 README into sections.
@@ -77,51 +151,31 @@ def parse_sections(markdown: str) -> list[Section]:
     Splits on markdown headings (## or ###) and HTML anchor tags.
     Each section has a heading and the content block until the next.
     """
-    lines = markdown.split("\n")
-    sections: list[Section] = []
-    current_heading: str | None = None
-    current_lines: list[str] = []
-
-    for line in lines:
-        # Check for markdown heading (## or ###)
-        heading_match = re.match(r"^(#{2,3})\s+(.+)", line)
-        # Check for HTML anchor
-        anchor_match = _ANCHOR_RE.search(line)
-
-        if heading_match or anchor_match:
-            # Save previous section
-            if current_heading is not None:
-                sections.append(
-                    Section(
-                        heading=current_heading,
-                        content="\n".join(current_lines).strip(),
-                    )
-                )
-
-            if heading_match:
-                current_heading = heading_match.group(2).strip()
-            elif anchor_match:
-                current_heading = anchor_match.group(1).strip()
-
-            current_lines = [line]
-        else:
-            current_lines.append(line)
-
-    # Don't forget the last section
-    if current_heading is not None:
-        sections.append(
-            Section(
-                heading=current_heading,
-                content="\n".join(current_lines).strip(),
-            )
-        )
-
-    return sections
+    starts = [
+        (match.start(), (match.group("heading") or match.group("anchor")).strip())
+        for match in _SECTION_START_RE.finditer(markdown)
+    ]
+    # Each section runs up to the next section's start, the last to the end
+    ends = [start for start, _ in starts[1:]]
+    ends.append(len(markdown))
+    return [
+        Section(heading=heading, content=markdown[start:end].strip())
+        for (start, heading), end in zip(starts, ends, strict=False)
+    ]
+
+
+@lru_cache(maxsize=256)
+def parsed_sections(markdown: str) -> tuple[Section, ...]:
+    """Cached parse_sections, keyed on the page content itself.
+
+    A page refreshed after its TTL is a different string, so it is reparsed.
+    """
+    return tuple(parse_sections(markdown))
 
 
 def search_sections(
     query: str,
-    sections: list[Section],
+    sections: Sequence[Section],
     *,
     max_results: int = 10,
 ) -> list[Section]:
@@ -134,8 +188,8 @@ def search_sections(
 
     for section in sections:
         score = 0
-        heading_lower = section.heading.lower()
-        content_lower = section.content.lower()
+        heading_lower = section.heading_lower
+        content_lower = section.content_lower
 
         for term in terms:
             if term in heading_lower:
@@ -146,5 +200,6 @@ def search_sections(
         if score > 0:
             scored.append((section, score))
 
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return [s for s, _ in scored[:max_results]]
+    # nlargest is stable, so ties keep document order like a sorted slice
+    top = heapq.nlargest(max_results, scored, key=itemgetter(1))
+    return [s for s, _ in top]
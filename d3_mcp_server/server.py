@@ -1,9 +1,14 @@
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 from fastmcp import FastMCP
 from fastmcp.exceptions import ToolError
 from fastmcp.server.context import Context
 
-from d3_mcp_server.cache import fetch_page
+from d3_mcp_server.cache import close_client, fetch_page, fetch_pages, flush_writes
 from d3_mcp_server.examples import (
+    category_counts,
+    examples_in_category,
     fetch_gallery,
     fetch_notebook,
     score_examples,
@@ -15,12 +20,30 @@ from d3_mcp_server.modules import (
     resolve_page_path,
 )
 from d3_mcp_server.search import (
-    parse_sections,
+    parsed_sections,
     score_modules,
     search_sections,
 )
 
-mcp = FastMCP("D3 Documentation Server")
+
+@asynccontextmanager
+async def _lifespan(_server: FastMCP) -> AsyncGenerator[None]:
+    """Flush pending cache writes and close the HTTP client on shutdown."""
+    try:
+        yield
+    finally:
+        try:
+            await flush_writes()
+        finally:
+            await close_client()
+
+
+mcp = FastMCP("D3 Documentation Server", lifespan=_lifespan)
+
+# The module registry is static, so the no-query listing is built once
+_ALL_MODULES_LISTING = f"Available D3 modules ({len(D3_MODULES)}):\n\n" + "\n".join(
+    f"- **{m.name}** ({len(m.pages)} pages): {m.description}" for m in D3_MODULES
+)
 
 
 @mcp.tool
@@ -30,11 +53,7 @@ async def find_module(query: str | None = None) -> str:
     Without a query, lists all modules. With a query, returns top 5.
     """
     if not query:
-        lines = [
-            f"- **{m.name}** ({len(m.pages)} pages): {m.description}"
-            for m in D3_MODULES
-        ]
-        return f"Available D3 modules ({len(D3_MODULES)}):\n\n" + "\n".join(lines)
+        return _ALL_MODULES_LISTING
 
     scored = score_modules(query, D3_MODULES)
     if not scored:
@@ -116,10 +135,10 @@ async def search_docs(
         return f"No relevant modules found for '{query}'."
 
     all_results: list[str] = []
+    contents = await fetch_pages(pages, ctx)
 
-    for page_path in pages:
-        content = await fetch_page(page_path, ctx)
-        sections = parse_sections(content)
+    for page_path, content in zip(pages, contents, strict=True):
+        sections = parsed_sections(content)
         matches = search_sections(query, sections, max_results=3)
 
         if matches:
@@ -151,10 +170,8 @@ async def find_example(
     examples = await fetch_gallery(ctx)
 
     if not query and not category:
-        categories: dict[str, int] = {}
-        for ex in examples:
-            categories[ex.category] = categories.get(ex.category, 0) + 1
-        lines = [f"- **{cat}** ({count})" for cat, count in sorted(categories.items())]
+        categories = category_counts(examples)
+        lines = [f"- **{cat}** ({count})" for cat, count in categories.items()]
         return (
             f"D3 example categories ({len(categories)}, "
             f"{len(examples)} total examples):\n\n"
@@ -164,10 +181,9 @@ async def find_example(
         )
 
     if category:
-        cat_lower = category.lower()
-        filtered = [ex for ex in examples if ex.category.lower() == cat_lower]
+        filtered = examples_in_category(examples, category)
         if not filtered:
-            cats = sorted({ex.category for ex in examples})
+            cats = category_counts(examples)
             return f"Unknown category '{category}'. Available: {', '.join(cats)}"
         lines = [f"- **{ex.title}** by {ex.author} — `{ex.path}`" for ex in filtered]
         return (
@@ -5,38 +5,65 @@ Run directly:  uv run python -m d3_mcp_server.sync
 
 from __future__ import annotations
 
+import logging
+import re
+from contextlib import suppress
+
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from pydantic import BaseModel
 
-from d3_mcp_server.modules import BASE_URL, D3_MODULE_MAP, D3_MODULES
+from d3_mcp_server.cache import CACHE_DIR
+from d3_mcp_server.modules import BASE_URL, D3_MODULES
 
+logger = logging.getLogger(__name__)
 
-def fetch_live_registry() -> dict[str, list[str]]:
-    """Scrape d3js.org/api sidebar and return {module_name: [pages]}.
+# Last scraped registry plus the validators needed to revalidate it
+_SYNC_CACHE = CACHE_DIR / "_sync_registry.json"
 
-    Each module maps to a list of page paths (including its index page).
-    """
-    response = httpx.get(f"{BASE_URL}/api", timeout=30)
-    response.raise_for_status()
+# Bump when the sidebar parsing changes what it returns, so a snapshot saved
+# by older code is refetched instead of being reused on a 304
+_PARSER_VERSION = 1
+
+# The hardcoded registry is static, so its page sets are built once
+_LOCAL_PAGES: dict[str, frozenset[str]] = {
+    m.name: frozenset(m.pages) for m in D3_MODULES
+}
+
+# The sidebar is a flat list of links, so a targeted scan finds the hrefs
+# without building a DOM. The strainer-based parse is kept as a fallback.
+_SIDEBAR_NAV_RE = re.compile(
+    r"""<nav\b[^>]*\bid=["']VPSidebarNav["'][^>]*>(.*?)</nav>""", re.DOTALL
+)
+_SIDEBAR_HREF_RE = re.compile(r"""(?<![\w-])href=["'](/d3-[^"']+)""")
+_SIDEBAR_STRAINER = SoupStrainer("nav", id="VPSidebarNav")
 
-    soup = BeautifulSoup(response.text, "html.parser")
+
+def _sidebar_hrefs(html: str) -> list[str]:
+    """Return the /d3-* link targets of the sidebar nav, in document order."""
+    match = _SIDEBAR_NAV_RE.search(html)
+    if match:
+        return _SIDEBAR_HREF_RE.findall(match[1])
+
+    # Markup the scan doesn't recognize: fall back to a real parse
+    soup = BeautifulSoup(html, "lxml", parse_only=_SIDEBAR_STRAINER)
     nav = soup.find("nav", id="VPSidebarNav")
     if not nav:
         msg = "Could not find sidebar nav on d3js.org/api"
         raise RuntimeError(msg)
+    hrefs = (str(link["href"]) for link in nav.find_all("a", href=True))
+    return [href for href in hrefs if href.startswith("/d3-")]
 
+
+def _parse_registry(html: str) -> dict[str, list[str]]:
+    """Group sidebar hrefs into {module_name: [pages]}."""
     modules: dict[str, list[str]] = {}
     current_module: str | None = None
 
-    for link in nav.find_all("a", href=True):
-        href = str(link["href"])
-        if not href.startswith("/d3-"):
-            continue
-
-        parts = href.strip("/").split("/")
-        module_name = parts[0]
+    for href in _sidebar_hrefs(html):
+        module_name, sep, _ = href.strip("/").partition("/")
 
-        if len(parts) == 1:
+        if not sep:
             # Module index page
             current_module = module_name
             modules[module_name] = [href]
@@ -47,6 +74,65 @@ def fetch_live_registry() -> dict[str, list[str]]:
     return modules
 
 
+class _RegistrySnapshot(BaseModel):
+    """A parsed sidebar registry with the HTTP validators it was served with."""
+
+    parser_version: int
+    etag: str | None = None
+    last_modified: str | None = None
+    modules: dict[str, list[str]]
+
+
+def _load_snapshot() -> _RegistrySnapshot | None:
+    # ValueError covers both a ValidationError and a file that isn't UTF-8
+    with suppress(OSError, ValueError):
+        snapshot = _RegistrySnapshot.model_validate_json(_SYNC_CACHE.read_text())
+        if snapshot.parser_version == _PARSER_VERSION:
+            return snapshot
+    return None
+
+
+def _save_snapshot(snapshot: _RegistrySnapshot) -> None:
+    try:
+        _SYNC_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        _SYNC_CACHE.write_text(snapshot.model_dump_json())
+    except OSError:
+        # The registry was still fetched; the next run just can't revalidate
+        logger.exception("Failed to save sync registry snapshot")
+
+
+def fetch_live_registry() -> dict[str, list[str]]:
+    """Scrape d3js.org/api sidebar and return {module_name: [pages]}.
+
+    Each module maps to a list of page paths (including its index page).
+    The request is conditional on the last scrape, so an unchanged page
+    comes back as a 304 and the stored registry is reused.
+    """
+    cached = _load_snapshot()
+    headers: dict[str, str] = {}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    response = httpx.get(f"{BASE_URL}/api", headers=headers, timeout=30)
+    if cached and response.status_code == httpx.codes.NOT_MODIFIED:
+        return cached.modules
+    response.raise_for_status()
+
+    modules = _parse_registry(response.text)
+    if "ETag" in response.headers or "Last-Modified" in response.headers:
+        _save_snapshot(
+            _RegistrySnapshot(
+                parser_version=_PARSER_VERSION,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                modules=modules,
+            )
+        )
+    return modules
+
+
 def diff_registry() -> dict[str, list[str]]:
     """Compare live d3js.org registry against hardcoded D3_MODULES.
 
@@ -57,28 +143,24 @@ def diff_registry() -> dict[str, list[str]]:
       - "removed_pages": pages in our registry but not on d3js.org
     """
     live = fetch_live_registry()
-    local_names = {m.name for m in D3_MODULES}
-    live_names = set(live.keys())
+    local_names = _LOCAL_PAGES.keys()
+    live_names = live.keys()
 
     issues: dict[str, list[str]] = {
-        "added_modules": [],
-        "removed_modules": [],
+        # Modules present on live site but missing locally
+        "added_modules": [
+            f"{name} ({', '.join(live[name])})"
+            for name in sorted(live_names - local_names)
+        ],
+        # Modules in our registry but gone from live site
+        "removed_modules": sorted(local_names - live_names),
         "added_pages": [],
         "removed_pages": [],
     }
 
-    # Modules present on live site but missing locally
-    for name in sorted(live_names - local_names):
-        pages = ", ".join(live[name])
-        issues["added_modules"].append(f"{name} ({pages})")
-
-    # Modules in our registry but gone from live site
-    for name in sorted(local_names - live_names):
-        issues["removed_modules"].append(name)
-
     # Page-level diffs for shared modules
     for name in sorted(local_names & live_names):
-        local_pages = set(D3_MODULE_MAP[name].pages)
+        local_pages = _LOCAL_PAGES[name]
         live_pages = set(live[name])
 
         for page in sorted(live_pages - local_pages):
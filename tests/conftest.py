@@ -0,0 +1,27 @@
+from collections.abc import Iterator
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+@pytest.fixture
+def mock_http() -> Iterator[AsyncMock]:
+    """Stand in for the shared HTTP client used by the cache and examples.
+
+    Every get() returns the same 200 response; set
+    ``mock_http.get.return_value.text`` (or ``status_code``) per test, or
+    ``mock_http.get.side_effect`` to simulate transport errors.
+    """
+    response = AsyncMock()
+    response.status_code = 200
+    response.text = ""
+    response.raise_for_status = lambda: None
+
+    client = AsyncMock()
+    client.get.return_value = response
+
+    with (
+        patch("d3_mcp_server.cache._client", return_value=client),
+        patch("d3_mcp_server.examples._client", return_value=client),
+    ):
+        yield client
@@ -1,3 +1,6 @@
+import asyncio
+import os
+import threading
 import time
 from pathlib import Path
 from unittest.mock import AsyncMock, patch
@@ -6,12 +9,21 @@ import httpx
 import pytest
 from fastmcp.exceptions import ToolError
 
+from d3_mcp_server import cache
 from d3_mcp_server.cache import (
     CACHE_TTL_SECONDS,
     _cache_path,
+    _client,
+    _fresh_mtime,
     _html_to_markdown,
-    _is_fresh,
+    _mem_get,
+    _mem_put,
+    _read_fresh,
+    _schedule_write,
+    close_client,
     fetch_page,
+    fetch_pages,
+    flush_writes,
 )
 
 # --- HTML to markdown tests ---
@@ -48,6 +60,19 @@ class TestHtmlToMarkdown:
         assert "API Reference" in md
         assert "Details here" in md
 
+    def test_matches_container_with_extra_classes(self) -> None:
+        html = """
+        <html><body>
+        <nav>Navigation</nav>
+        <div class="vp-doc _d3-scale">
+            <p>Scoped docs.</p>
+        </div>
+        </body></html>
+        """
+        md = _html_to_markdown(html)
+        assert "Scoped docs" in md
+        assert "Navigation" not in md
+
     def test_falls_back_to_body(self) -> None:
         html = """
         <html><body>
@@ -107,23 +132,171 @@ class TestCachePath:
 # --- Cache freshness tests ---
 
 
-class TestIsFresh:
+class TestFreshMtime:
     def test_nonexistent_file(self, tmp_path: Path) -> None:
-        assert _is_fresh(tmp_path / "nope.md") is False
+        assert _fresh_mtime(tmp_path / "nope.md") is None
 
     def test_fresh_file(self, tmp_path: Path) -> None:
         f = tmp_path / "test.md"
         f.write_text("content")
-        assert _is_fresh(f) is True
+        assert _fresh_mtime(f) == f.stat().st_mtime
 
     def test_stale_file(self, tmp_path: Path) -> None:
         f = tmp_path / "test.md"
         f.write_text("content")
         stale_time = time.time() - CACHE_TTL_SECONDS - 1
-        import os
+        os.utime(f, (stale_time, stale_time))
+        assert _fresh_mtime(f) is None
+
 
+class TestReadFresh:
+    @pytest.mark.asyncio
+    async def test_returns_content_and_mtime(self, tmp_path: Path) -> None:
+        f = tmp_path / "test.md"
+        f.write_text("content")
+        assert await _read_fresh(f) == ("content", f.stat().st_mtime)
+
+    @pytest.mark.asyncio
+    async def test_missing_or_stale_file(self, tmp_path: Path) -> None:
+        f = tmp_path / "test.md"
+        assert await _read_fresh(f) is None
+        f.write_text("content")
+        stale_time = time.time() - CACHE_TTL_SECONDS - 1
         os.utime(f, (stale_time, stale_time))
-        assert _is_fresh(f) is False
+        assert await _read_fresh(f) is None
+
+
+# --- In-memory cache tests ---
+
+
+class TestMemCache:
+    def test_returns_fresh_value(self, tmp_path: Path) -> None:
+        path = tmp_path / "page.md"
+        _mem_put(path, "content")
+        assert _mem_get(path) == "content"
+
+    def test_expires_with_file_ttl(self, tmp_path: Path) -> None:
+        path = tmp_path / "page.md"
+        _mem_put(path, "content", time.time() - CACHE_TTL_SECONDS - 1)
+        assert _mem_get(path) is None
+
+    def test_missing_entry(self, tmp_path: Path) -> None:
+        assert _mem_get(tmp_path / "nope.md") is None
+
+
+# --- Deferred write tests ---
+
+
+class TestScheduleWrite:
+    @pytest.mark.asyncio
+    async def test_flush_writes_latest_content(self, tmp_path: Path) -> None:
+        path = tmp_path / "nested" / "page.md"
+        _schedule_write(path, "first")
+        _schedule_write(path, "second")
+        assert not path.exists()
+
+        await flush_writes()
+        assert path.read_text() == "second"
+
+    @pytest.mark.asyncio
+    async def test_write_scheduled_mid_flush_lands(self, tmp_path: Path) -> None:
+        first, second = tmp_path / "first.md", tmp_path / "second.md"
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_write(writes: dict[Path, str]) -> None:
+            started.set()
+            release.wait(5)
+            for path, content in writes.items():
+                path.write_text(content)
+
+        with (
+            patch("d3_mcp_server.cache._FLUSH_DELAY_SECONDS", 0),
+            patch("d3_mcp_server.cache._write_files", side_effect=slow_write),
+        ):
+            _schedule_write(first, "first")
+            await asyncio.to_thread(started.wait, 5)
+            _schedule_write(second, "second")
+            release.set()
+            for _ in range(100):
+                if second.exists():
+                    break
+                await asyncio.sleep(0.01)
+
+        assert first.read_text() == "first"
+        assert second.read_text() == "second"
+
+    @pytest.mark.asyncio
+    async def test_flush_waits_for_batch_being_written(self, tmp_path: Path) -> None:
+        path = tmp_path / "page.md"
+        started = threading.Event()
+
+        def slow_write(writes: dict[Path, str]) -> None:
+            started.set()
+            time.sleep(0.1)
+            for p, content in writes.items():
+                p.write_text(content)
+
+        with (
+            patch("d3_mcp_server.cache._FLUSH_DELAY_SECONDS", 0),
+            patch("d3_mcp_server.cache._write_files", side_effect=slow_write),
+        ):
+            _schedule_write(path, "content")
+            await asyncio.to_thread(started.wait, 5)
+            await flush_writes()
+
+        assert path.read_text() == "content"
+
+    @pytest.mark.asyncio
+    async def test_flush_raises_error_from_batch_being_written(
+        self, tmp_path: Path
+    ) -> None:
+        started = threading.Event()
+
+        def failing_write(writes: dict[Path, str]) -> None:
+            started.set()
+            time.sleep(0.1)
+            raise PermissionError
+
+        with (
+            patch("d3_mcp_server.cache._FLUSH_DELAY_SECONDS", 0),
+            patch("d3_mcp_server.cache._write_files", side_effect=failing_write),
+        ):
+            _schedule_write(tmp_path / "page.md", "content")
+            await asyncio.to_thread(started.wait, 5)
+            with pytest.raises(PermissionError):
+                await flush_writes()
+
+    @pytest.mark.asyncio
+    async def test_background_write_error_is_logged(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        with (
+            patch("d3_mcp_server.cache._FLUSH_DELAY_SECONDS", 0),
+            patch("d3_mcp_server.cache._write_files", side_effect=OSError("disk full")),
+        ):
+            _schedule_write(tmp_path / "page.md", "content")
+            task = cache._FLUSH_TASK
+            assert task is not None
+            await task
+
+        assert "Failed to write cache files" in caplog.text
+
+
+# --- Shared client tests ---
+
+
+class TestClient:
+    @pytest.mark.asyncio
+    async def test_reuses_client_until_closed(self) -> None:
+        with patch("d3_mcp_server.cache._CLIENT", None):
+            client = _client()
+            assert _client() is client
+
+            await close_client()
+            assert client.is_closed
+            assert _client() is not client
+            await close_client()
 
 
 # --- fetch_page tests ---
@@ -141,26 +314,18 @@ FAKE_HTML = """
 
 class TestFetchPage:
     @pytest.mark.asyncio
-    async def test_fetches_and_caches(self, tmp_path: Path) -> None:
-        mock_response = AsyncMock()
-        mock_response.status_code = 200
-        mock_response.text = FAKE_HTML
-        mock_response.raise_for_status = lambda: None
-
-        with (
-            patch("d3_mcp_server.cache.CACHE_DIR", tmp_path),
-            patch("d3_mcp_server.cache.httpx.AsyncClient") as mock_client_cls,
-        ):
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_client_cls.return_value = mock_client
+    async def test_fetches_and_caches(
+        self, tmp_path: Path, mock_http: AsyncMock
+    ) -> None:
+        mock_http.get.return_value.text = FAKE_HTML
 
+        with patch("d3_mcp_server.cache.CACHE_DIR", tmp_path):
             result = await fetch_page("/d3-color")
+            await flush_writes()
 
         assert "d3-color" in result
         assert "Color spaces" in result
+        assert (tmp_path / "d3-color.md").read_text() == result
 
     @pytest.mark.asyncio
     async def test_returns_cached_on_second_call(self, tmp_path: Path) -> None:
@@ -173,49 +338,80 @@ class TestFetchPage:
         assert result == "cached content"
 
     @pytest.mark.asyncio
-    async def test_404_raises_tool_error(self, tmp_path: Path) -> None:
-        mock_response = AsyncMock()
-        mock_response.status_code = 404
+    async def test_repeat_calls_served_from_memory(self, tmp_path: Path) -> None:
+        cache_file = tmp_path / "d3-color.md"
+        cache_file.write_text("cached content")
+
+        with patch("d3_mcp_server.cache.CACHE_DIR", tmp_path):
+            await fetch_page("/d3-color")
+            cache_file.unlink()
+            result = await fetch_page("/d3-color")
+
+        assert result == "cached content"
+
+    @pytest.mark.asyncio
+    async def test_404_raises_tool_error(
+        self, tmp_path: Path, mock_http: AsyncMock
+    ) -> None:
+        mock_http.get.return_value.status_code = 404
 
         with (
             patch("d3_mcp_server.cache.CACHE_DIR", tmp_path),
-            patch("d3_mcp_server.cache.httpx.AsyncClient") as mock_client_cls,
+            pytest.raises(ToolError, match="Page not found"),
         ):
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_client_cls.return_value = mock_client
+            await fetch_page("/d3-fake")
+
+    @pytest.mark.asyncio
+    async def test_timeout_raises_tool_error(
+        self, tmp_path: Path, mock_http: AsyncMock
+    ) -> None:
+        mock_http.get.side_effect = httpx.ReadTimeout("timed out")
 
-            with pytest.raises(ToolError, match="Page not found"):
-                await fetch_page("/d3-fake")
+        with (
+            patch("d3_mcp_server.cache.CACHE_DIR", tmp_path),
+            pytest.raises(ToolError, match="Timeout"),
+        ):
+            await fetch_page("/d3-scale")
 
     @pytest.mark.asyncio
-    async def test_timeout_raises_tool_error(self, tmp_path: Path) -> None:
+    async def test_connection_error_raises_tool_error(
+        self, tmp_path: Path, mock_http: AsyncMock
+    ) -> None:
+        mock_http.get.side_effect = httpx.ConnectError("refused")
+
         with (
             patch("d3_mcp_server.cache.CACHE_DIR", tmp_path),
-            patch("d3_mcp_server.cache.httpx.AsyncClient") as mock_client_cls,
+            pytest.raises(ToolError, match="Network error"),
         ):
-            mock_client = AsyncMock()
-            mock_client.get.side_effect = httpx.ReadTimeout("timed out")
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_client_cls.return_value = mock_client
+            await fetch_page("/d3-scale")
+
+
+# --- fetch_pages tests ---
 
-            with pytest.raises(ToolError, match="Timeout"):
-                await fetch_page("/d3-scale")
 
+class TestFetchPages:
     @pytest.mark.asyncio
-    async def test_connection_error_raises_tool_error(self, tmp_path: Path) -> None:
+    async def test_returns_pages_in_order(self) -> None:
+        async def fake_fetch(page: str, ctx: object = None) -> str:
+            return f"content of {page}"
+
+        with patch("d3_mcp_server.cache.fetch_page", side_effect=fake_fetch):
+            result = await fetch_pages(["/d3-scale", "/d3-array", "/d3-color"])
+
+        assert result == [
+            "content of /d3-scale",
+            "content of /d3-array",
+            "content of /d3-color",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_propagates_errors(self) -> None:
         with (
-            patch("d3_mcp_server.cache.CACHE_DIR", tmp_path),
-            patch("d3_mcp_server.cache.httpx.AsyncClient") as mock_client_cls,
+            patch(
+                "d3_mcp_server.cache.fetch_page",
+                new_callable=AsyncMock,
+                side_effect=ToolError("Page not found"),
+            ),
+            pytest.raises(ToolError, match="Page not found"),
         ):
-            mock_client = AsyncMock()
-            mock_client.get.side_effect = httpx.ConnectError("refused")
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_client_cls.return_value = mock_client
-
-            with pytest.raises(ToolError, match="Network error"):
-                await fetch_page("/d3-scale")
+            await fetch_pages(["/d3-fake"])
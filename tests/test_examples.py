@@ -4,12 +4,17 @@ from unittest.mock import AsyncMock, patch
 import pytest
 from fastmcp.exceptions import ToolError
 
+from d3_mcp_server.cache import flush_writes
 from d3_mcp_server.examples import (
     D3Example,
     _example_cache_path,
     _extract_description,
     _extract_file_attachments,
+    _extract_function_body,
     _extract_imports,
+    _unescape_js,
+    category_counts,
+    examples_in_category,
     extract_notebook_code,
     fetch_gallery,
     fetch_notebook,
@@ -145,6 +150,15 @@ export default function define(runtime, observer) {
 # --- Gallery parsing tests ---
 
 
+class TestUnescapeJs:
+    def test_unescapes_quotes_and_newlines(self) -> None:
+        assert _unescape_js('title: \\"Bar\\"\\n') == 'title: "Bar"\n'
+
+    def test_escaped_backslash_is_not_rescanned(self) -> None:
+        # \\n is an escaped backslash followed by "n", not a newline
+        assert _unescape_js("a\\\\nb") == "a\\nb"
+
+
 class TestParseGallery:
     def test_parses_examples(self) -> None:
         examples = parse_gallery(SAMPLE_GALLERY_HTML)
@@ -171,6 +185,47 @@ class TestParseGallery:
         )
         assert electric.author == "Mike Bostock"
 
+    def test_decodes_string_escapes(self) -> None:
+        html = (
+            '{"id":1,"value":"${previews([\\n{\\n'
+            '  path: \\"@d3/a\\",\\n'
+            '  thumbnail: \\"x\\",\\n'
+            '  title: \\"Lines \\\\\\\\ areas \\u2014 D3\\",\\n'
+            '  author: \\"D3\\"\\n'
+            '},\\n])}","name":"misc"}'
+        )
+        (example,) = parse_gallery(html)
+        assert example.title == "Lines \\ areas \u2014 D3"
+        assert example.category == "Misc"
+
+    def test_falls_back_for_non_json_literals(self) -> None:
+        html = (
+            '{"id":1,"value":"${previews([\\n{\\n'
+            '  path: \\"@d3/a\\",\\n'
+            '  thumbnail: \\"x\\",\\n'
+            '  title: \\"Area\\",\\n'
+            '  author: \\"D3\\"\\n'
+            '}, {path: \'single-quoted\'}\\n])}","name":"misc"}'
+        )
+        (example,) = parse_gallery(html)
+        assert example.path == "@d3/a"
+        assert example.title == "Area"
+
+    def test_parses_unescaped_previews(self) -> None:
+        html = SAMPLE_GALLERY_HTML.replace('\\"', '"').replace("\\n", "\n")
+        examples = parse_gallery(html)
+        assert [e.path for e in examples] == [
+            e.path for e in parse_gallery(SAMPLE_GALLERY_HTML)
+        ]
+        assert examples[0].title == "Animated treemap"
+        assert examples[0].category == "Animation"
+
+    def test_key_name_inside_value(self) -> None:
+        html = SAMPLE_GALLERY_HTML.replace("Bar chart race", "Race, path: title")
+        examples = parse_gallery(html)
+        assert len(examples) == 4
+        assert examples[1].title == "Race, path: title"
+
     def test_empty_html_returns_empty(self) -> None:
         assert parse_gallery("<html></html>") == []
 
@@ -178,9 +233,9 @@ class TestParseGallery:
 # --- Example scoring tests ---
 
 
-@pytest.fixture
-def sample_examples() -> list[D3Example]:
-    return [
+@pytest.fixture(scope="module")
+def sample_examples() -> tuple[D3Example, ...]:
+    return (
         D3Example(
             path="@d3/bar-chart/2",
             title="Bar chart",
@@ -205,45 +260,103 @@ def sample_examples() -> list[D3Example]:
             category="Lines",
             author="D3",
         ),
-    ]
+    )
 
 
 class TestScoreExamples:
-    def test_title_match(self, sample_examples: list[D3Example]) -> None:
+    def test_title_match(self, sample_examples: tuple[D3Example, ...]) -> None:
         results = score_examples("bar", sample_examples)
         assert results[0][0].path == "@d3/bar-chart/2"
 
-    def test_category_match(self, sample_examples: list[D3Example]) -> None:
+    def test_category_match(self, sample_examples: tuple[D3Example, ...]) -> None:
         results = score_examples("bars", sample_examples)
         assert any(ex.category == "Bars" for ex, _ in results)
 
-    def test_no_match(self, sample_examples: list[D3Example]) -> None:
+    def test_no_match(self, sample_examples: tuple[D3Example, ...]) -> None:
         results = score_examples("zzzznotfound", sample_examples)
         assert results == []
 
-    def test_sorted_by_score(self, sample_examples: list[D3Example]) -> None:
+    def test_sorted_by_score(self, sample_examples: tuple[D3Example, ...]) -> None:
         results = score_examples("chart", sample_examples)
         scores = [s for _, s in results]
         assert scores == sorted(scores, reverse=True)
 
-    def test_multi_word_query(self, sample_examples: list[D3Example]) -> None:
+    def test_multi_word_query(self, sample_examples: tuple[D3Example, ...]) -> None:
         results = score_examples("bar chart", sample_examples)
         assert results[0][0].path == "@d3/bar-chart/2"
 
-    def test_camel_case_splits(self, sample_examples: list[D3Example]) -> None:
+    def test_camel_case_splits(self, sample_examples: tuple[D3Example, ...]) -> None:
         results = score_examples("barChart", sample_examples)
         assert len(results) > 0
         assert results[0][0].path == "@d3/bar-chart/2"
 
-    def test_camel_case_line_chart(self, sample_examples: list[D3Example]) -> None:
+    def test_camel_case_line_chart(
+        self, sample_examples: tuple[D3Example, ...]
+    ) -> None:
         results = score_examples("lineChart", sample_examples)
         assert len(results) > 0
         assert results[0][0].path == "@d3/line-chart/2"
 
+    def test_title_substring_scores_below_word(
+        self, sample_examples: tuple[D3Example, ...]
+    ) -> None:
+        scores = {ex.path: s for ex, s in score_examples("char", sample_examples)}
+        assert scores["@d3/bar-chart/2"] == 5 + 1
+
+    def test_index_follows_new_example_list(
+        self, sample_examples: tuple[D3Example, ...]
+    ) -> None:
+        assert score_examples("pie", sample_examples) == []
+        refreshed = [
+            *sample_examples,
+            D3Example(
+                path="@d3/pie-chart/2",
+                title="Pie chart",
+                category="Radial",
+                author="D3",
+            ),
+        ]
+        results = score_examples("pie", refreshed)
+        assert [ex.path for ex, _ in results] == ["@d3/pie-chart/2"]
+
+
+class TestCategoryLookups:
+    def test_counts_sorted_by_name(
+        self, sample_examples: tuple[D3Example, ...]
+    ) -> None:
+        extra = D3Example(path="@d3/x", title="X", category="Bars", author="D3")
+        counts = category_counts([*sample_examples, extra])
+        assert list(counts) == ["Bars", "Hierarchies", "Lines", "Networks"]
+        assert counts["Bars"] == 2
+
+    def test_filter_ignores_case(self, sample_examples: tuple[D3Example, ...]) -> None:
+        results = examples_in_category(sample_examples, "lines")
+        assert [ex.path for ex in results] == ["@d3/line-chart/2"]
+
+    def test_unknown_category(self, sample_examples: tuple[D3Example, ...]) -> None:
+        assert examples_in_category(sample_examples, "Radial") == []
+
 
 # --- Notebook code extraction tests ---
 
 
+class TestExtractFunctionBody:
+    def test_ignores_braces_in_strings_and_comments(self) -> None:
+        source = (
+            "f() {\n  const s = \"}{\", t = `${x}`, u = '\\'}';\n"
+            "  // }\n  /* } */\n  return {a: 1};\n}\nrest"
+        )
+        body = _extract_function_body(source, source.index("{") + 1)
+        assert body.startswith("const s")
+        assert body.endswith("return {a: 1};")
+
+    def test_unbalanced_returns_empty(self) -> None:
+        assert _extract_function_body("{ if (x) { return 1; }", 1) == ""
+
+    def test_unterminated_comment_returns_empty(self) -> None:
+        assert _extract_function_body("{ /* } ", 1) == ""
+
+
 class TestExtractDescription:
     def test_extracts_description_text(self) -> None:
         desc = _extract_description(SAMPLE_NOTEBOOK_JS)
@@ -354,6 +467,23 @@ class TestExtractNotebookCode:
         result = extract_notebook_code(SAMPLE_NOTEBOOK_JS)
         assert "data" in result
 
+    def test_async_chart_cell(self) -> None:
+        source = SAMPLE_NOTEBOOK_JS.replace(
+            "function _chart(d3,data)", "async function _chart(d3,data)"
+        )
+        result = extract_notebook_code(source)
+        assert "No chart code" not in result
+        assert "scaleBand" in result
+
+    def test_ignores_wiring_text_outside_define(self) -> None:
+        source = SAMPLE_NOTEBOOK_JS.replace(
+            "const width = 928;",
+            'const width = 928; // ["fake.csv", {url: "https://example.com/x"}]',
+        )
+        result = extract_notebook_code(source)
+        assert "fake.csv" in result  # still shown as part of the chart code
+        assert "- `fake.csv`" not in result
+
 
 # --- Cache path tests ---
 
@@ -374,26 +504,24 @@ class TestExampleCachePath:
 
 class TestFetchGallery:
     @pytest.mark.asyncio
-    async def test_fetches_and_caches(self, tmp_path: Path) -> None:
-        mock_response = AsyncMock()
-        mock_response.status_code = 200
-        mock_response.text = SAMPLE_GALLERY_HTML
+    async def test_fetches_and_caches(
+        self, tmp_path: Path, mock_http: AsyncMock
+    ) -> None:
+        import json
+
+        mock_http.get.return_value.text = SAMPLE_GALLERY_HTML
 
         with (
             patch("d3_mcp_server.examples.CACHE_DIR", tmp_path),
             patch("d3_mcp_server.examples._GALLERY_CACHE", tmp_path / "_gallery.json"),
-            patch("d3_mcp_server.examples.httpx.AsyncClient") as mock_cls,
         ):
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_cls.return_value = mock_client
-
             examples = await fetch_gallery()
+            await flush_writes()
 
         assert len(examples) == 4
         assert any(e.path == "@d3/bar-chart/2" for e in examples)
+        cached = json.loads((tmp_path / "_gallery.json").read_text())
+        assert cached == [e.model_dump() for e in examples]
 
     @pytest.mark.asyncio
     async def test_returns_cached(self, tmp_path: Path) -> None:
@@ -412,56 +540,58 @@ class TestFetchGallery:
 
         with (
             patch("d3_mcp_server.examples._GALLERY_CACHE", cache_file),
-            patch("d3_mcp_server.examples.CACHE_TTL_SECONDS", 99999),
+            patch("d3_mcp_server.cache.CACHE_TTL_SECONDS", 99999),
         ):
             examples = await fetch_gallery()
 
         assert len(examples) == 1
         assert examples[0].path == "@d3/test"
 
+    @pytest.mark.asyncio
+    async def test_reuses_parsed_examples(self, tmp_path: Path) -> None:
+        import json
+
+        data = [
+            {"path": "@d3/test", "title": "Test", "category": "Test", "author": "D3"}
+        ]
+        cache_file = tmp_path / "_gallery.json"
+        cache_file.write_text(json.dumps(data))
+
+        with patch("d3_mcp_server.examples._GALLERY_CACHE", cache_file):
+            first = await fetch_gallery()
+            second = await fetch_gallery()
+
+        assert second is first
+
 
 # --- fetch_notebook tests ---
 
 
 class TestFetchNotebook:
     @pytest.mark.asyncio
-    async def test_fetches_and_extracts(self, tmp_path: Path) -> None:
-        mock_response = AsyncMock()
-        mock_response.status_code = 200
-        mock_response.text = SAMPLE_NOTEBOOK_JS
-        mock_response.raise_for_status = lambda: None
-
-        with (
-            patch("d3_mcp_server.examples._EXAMPLES_DIR", tmp_path / "examples"),
-            patch("d3_mcp_server.examples.httpx.AsyncClient") as mock_cls,
-        ):
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_cls.return_value = mock_client
+    async def test_fetches_and_extracts(
+        self, tmp_path: Path, mock_http: AsyncMock
+    ) -> None:
+        mock_http.get.return_value.text = SAMPLE_NOTEBOOK_JS
 
+        with patch("d3_mcp_server.examples._EXAMPLES_DIR", tmp_path / "examples"):
             result = await fetch_notebook("@d3/bar-chart/2")
+            await flush_writes()
 
         assert "scaleBand" in result
+        assert (tmp_path / "examples" / "d3" / "bar-chart" / "2.md").exists()
 
     @pytest.mark.asyncio
-    async def test_404_raises_tool_error(self, tmp_path: Path) -> None:
-        mock_response = AsyncMock()
-        mock_response.status_code = 404
+    async def test_404_raises_tool_error(
+        self, tmp_path: Path, mock_http: AsyncMock
+    ) -> None:
+        mock_http.get.return_value.status_code = 404
 
         with (
             patch("d3_mcp_server.examples._EXAMPLES_DIR", tmp_path / "examples"),
-            patch("d3_mcp_server.examples.httpx.AsyncClient") as mock_cls,
+            pytest.raises(ToolError, match="not found"),
         ):
-            mock_client = AsyncMock()
-            mock_client.get.return_value = mock_response
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_cls.return_value = mock_client
-
-            with pytest.raises(ToolError, match="not found"):
-                await fetch_notebook("@d3/nonexistent")
+            await fetch_notebook("@d3/nonexistent")
 
 
 # --- Tool integration tests ---
@@ -1,4 +1,5 @@
 import pytest
+from pydantic import ValidationError
 
 from d3_mcp_server.modules import (
     D3_MODULES,
@@ -7,7 +8,14 @@ from d3_mcp_server.modules import (
     resolve_module_name,
     resolve_page_path,
 )
-from d3_mcp_server.search import Section, parse_sections, score_modules, search_sections
+from d3_mcp_server.search import (
+    Section,
+    _split_terms,
+    parse_sections,
+    parsed_sections,
+    score_modules,
+    search_sections,
+)
 
 # --- Fixtures ---
 
@@ -42,9 +50,9 @@ Constructs a new sequential scale with the specified domain and interpolator.
 """
 
 
-@pytest.fixture
-def sample_modules() -> list[D3Module]:
-    return [
+@pytest.fixture(scope="module")
+def sample_modules() -> tuple[D3Module, ...]:
+    return (
         D3Module(
             name="d3-scale",
             description="Encodings that map abstract data to visual representation.",
@@ -63,49 +71,87 @@ def sample_modules() -> list[D3Module]:
             tags=["color", "rgb", "hsl", "lab"],
             pages=["/d3-color"],
         ),
-    ]
+    )
+
+
+# --- Term splitting tests ---
+
+
+class TestSplitTerms:
+    def test_splits_camel_case(self) -> None:
+        assert _split_terms("scaleLinear") == ("scale", "linear", "scalelinear")
+
+    def test_keeps_acronyms_and_digits_whole(self) -> None:
+        assert _split_terms("SVGPath") == ("svg", "path", "svgpath")
+        assert _split_terms("d3-geo") == ("d3", "geo", "d3-geo")
+        assert _split_terms("d3") == ("d3",)
+        assert _split_terms("D3") == ("d3",)
+        assert _split_terms("3D") == ("3d",)
+        assert _split_terms("D3.js") == ("d3", "js", "d3.js")
+
+    def test_uppercase_d3_adds_no_noise_modules(self) -> None:
+        results = score_modules("D3 force", D3_MODULES)
+        assert results[0][0].name == "d3-force"
+        # No single-letter "d" term matching tag substrings at score 1
+        assert all(score > 1 for _, score in results)
+
+    def test_repeat_query_is_cached(self) -> None:
+        assert _split_terms("bar chart") is _split_terms("bar chart")
 
 
 # --- Module scoring tests ---
 
 
 class TestScoreModules:
-    def test_exact_name_match(self, sample_modules: list[D3Module]) -> None:
+    def test_exact_name_match(self, sample_modules: tuple[D3Module, ...]) -> None:
         results = score_modules("d3-scale", sample_modules)
         assert results[0][0].name == "d3-scale"
         assert results[0][1] >= 10
 
-    def test_short_name_match(self, sample_modules: list[D3Module]) -> None:
+    def test_short_name_match(self, sample_modules: tuple[D3Module, ...]) -> None:
         results = score_modules("scale", sample_modules)
         assert results[0][0].name == "d3-scale"
 
-    def test_tag_match(self, sample_modules: list[D3Module]) -> None:
+    def test_tag_match(self, sample_modules: tuple[D3Module, ...]) -> None:
         results = score_modules("linear", sample_modules)
         assert results[0][0].name == "d3-scale"
 
-    def test_no_match(self, sample_modules: list[D3Module]) -> None:
+    def test_no_match(self, sample_modules: tuple[D3Module, ...]) -> None:
         results = score_modules("zzzznotfound", sample_modules)
         assert results == []
 
-    def test_sorted_by_score_descending(self, sample_modules: list[D3Module]) -> None:
+    def test_sorted_by_score_descending(
+        self, sample_modules: tuple[D3Module, ...]
+    ) -> None:
         results = score_modules("color", sample_modules)
         scores = [s for _, s in results]
         assert scores == sorted(scores, reverse=True)
 
-    def test_description_word_match(self, sample_modules: list[D3Module]) -> None:
+    def test_description_word_match(self, sample_modules: tuple[D3Module, ...]) -> None:
         results = score_modules("Graphical", sample_modules)
         assert results[0][0].name == "d3-shape"
 
-    def test_camel_case_splits(self, sample_modules: list[D3Module]) -> None:
+    def test_camel_case_splits(self, sample_modules: tuple[D3Module, ...]) -> None:
         results = score_modules("scaleLinear", sample_modules)
         assert len(results) > 0
         assert results[0][0].name == "d3-scale"
 
-    def test_camel_case_multi_word(self, sample_modules: list[D3Module]) -> None:
+    def test_camel_case_multi_word(self, sample_modules: tuple[D3Module, ...]) -> None:
         results = score_modules("scaleOrdinal", sample_modules)
         assert len(results) > 0
         assert results[0][0].name == "d3-scale"
 
+    def test_partial_tag_counts_once_per_module(
+        self, sample_modules: tuple[D3Module, ...]
+    ) -> None:
+        # "li" is inside both "linear" and "line"; each module scores it once
+        scores = {m.name: s for m, s in score_modules("li", sample_modules)}
+        assert scores == {"d3-scale": 1, "d3-shape": 1}
+
+    def test_all_modules_indexed(self) -> None:
+        results = score_modules("zoom", D3_MODULES)
+        assert results[0][0].name == "d3-zoom"
+
 
 # --- Section parsing tests ---
 
@@ -138,6 +184,11 @@ class TestParseSections:
         headings = [s.heading for s in sections]
         assert "Clamping" in headings
 
+    def test_cached_parse_matches_and_is_reused(self) -> None:
+        cached = parsed_sections(SAMPLE_MARKDOWN)
+        assert list(cached) == parse_sections(SAMPLE_MARKDOWN)
+        assert parsed_sections(SAMPLE_MARKDOWN) is cached
+
 
 # --- Section search tests ---
 
@@ -173,6 +224,18 @@ class TestSearchSections:
         # The section with "scaleLinear" in the heading should rank first
         assert results[0].heading == "scaleLinear"
 
+    def test_lowercase_fields_not_serialized(self) -> None:
+        section = Section(heading="Scale", content="Linear DOMAIN")
+        assert section.content_lower == "linear domain"
+        assert section.model_dump() == {"heading": "Scale", "content": "Linear DOMAIN"}
+
+    def test_section_is_immutable(self) -> None:
+        section = Section(heading="Scale", content="Linear")
+        assert section.content_lower == "linear"
+        with pytest.raises(ValidationError):
+            section.content = "Log"
+        assert section.model_copy(update={"content": "Log"}).content_lower == "log"
+
 
 # --- Module name resolution tests ---
 
@@ -194,6 +257,9 @@ class TestResolveModuleName:
         for m in D3_MODULES:
             assert resolve_module_name(m.name) == m.name
 
+    def test_short_name_of_longer_module(self) -> None:
+        assert resolve_module_name("scale-chromatic") == "d3-scale-chromatic"
+
 
 # --- Page path resolution tests ---
 
@@ -215,3 +281,7 @@ class TestResolvePagePath:
         for m in D3_MODULES:
             for p in m.pages:
                 assert p in D3_PAGE_MAP
+
+    def test_tables_are_read_only(self) -> None:
+        with pytest.raises(TypeError):
+            D3_PAGE_MAP["/d3-new"] = D3_MODULES[0]  # type: ignore[index]
@@ -3,7 +3,7 @@ from unittest.mock import AsyncMock, patch
 import pytest
 from fastmcp.exceptions import ToolError
 
-from d3_mcp_server.server import find_module, get_docs, search_docs
+from d3_mcp_server.server import _lifespan, find_module, get_docs, mcp, search_docs
 
 # --- find_module tests ---
 
@@ -107,7 +107,7 @@ class TestSearchDocs:
     @pytest.mark.asyncio
     async def test_search_within_module(self) -> None:
         with patch(
-            "d3_mcp_server.server.fetch_page",
+            "d3_mcp_server.cache.fetch_page",
             new_callable=AsyncMock,
             return_value=FAKE_SEARCHABLE,
         ):
@@ -122,7 +122,7 @@ class TestSearchDocs:
     @pytest.mark.asyncio
     async def test_no_results(self) -> None:
         with patch(
-            "d3_mcp_server.server.fetch_page",
+            "d3_mcp_server.cache.fetch_page",
             new_callable=AsyncMock,
             return_value="# Empty\n\nNothing relevant here.",
         ):
@@ -132,9 +132,29 @@ class TestSearchDocs:
     @pytest.mark.asyncio
     async def test_search_across_modules(self) -> None:
         with patch(
-            "d3_mcp_server.server.fetch_page",
+            "d3_mcp_server.cache.fetch_page",
             new_callable=AsyncMock,
             return_value=FAKE_SEARCHABLE,
         ):
             result = await search_docs("linear")
         assert "Linear" in result
+
+
+# --- lifespan tests ---
+
+
+class TestLifespan:
+    @pytest.mark.asyncio
+    async def test_closes_client_when_flush_fails(self) -> None:
+        with (
+            patch(
+                "d3_mcp_server.server.flush_writes",
+                new_callable=AsyncMock,
+                side_effect=OSError("disk full"),
+            ),
+            patch("d3_mcp_server.server.close_client", new_callable=AsyncMock) as close,
+            pytest.raises(OSError, match="disk full"),
+        ):
+            async with _lifespan(mcp):
+                pass
+        close.assert_awaited_once()
@@ -0,0 +1,191 @@
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from d3_mcp_server import sync
+from d3_mcp_server.sync import (
+    _PARSER_VERSION,
+    _RegistrySnapshot,
+    _sidebar_hrefs,
+    fetch_live_registry,
+)
+
+# --- Fixtures ---
+
+SIDEBAR_HTML = """
+<html><body>
+<nav class="nav"><a href="/d3-not-sidebar">Elsewhere</a></nav>
+<nav class="VPSidebarNav" id="VPSidebarNav" aria-labelledby="sidebar">
+  <div><a class="link" href="/d3-scale">d3-scale</a></div>
+  <div><a class="link" href="/d3-scale/linear">Linear</a></div>
+  <div><a class="link" href="/api">API index</a></div>
+  <div><a class="link" href='/d3-array'>d3-array</a></div>
+</nav>
+</body></html>
+"""
+
+SIDEBAR_REGISTRY = {
+    "d3-scale": ["/d3-scale", "/d3-scale/linear"],
+    "d3-array": ["/d3-array"],
+}
+
+
+class FakeGet:
+    """Stands in for httpx.get, recording the headers of each request."""
+
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.sent: list[dict[str, str]] = []
+
+    def __call__(
+        self, url: str, *, headers: dict[str, str], timeout: float
+    ) -> httpx.Response:
+        self.sent.append(headers)
+        text = SIDEBAR_HTML if self.status_code == 200 else ""
+        return httpx.Response(
+            self.status_code,
+            text=text,
+            headers=self.headers,
+            request=httpx.Request("GET", url),
+        )
+
+
+# --- Sidebar href tests ---
+
+
+class TestSidebarHrefs:
+    def test_regex_scan_finds_sidebar_links(self) -> None:
+        with patch.object(sync, "BeautifulSoup") as soup:
+            hrefs = _sidebar_hrefs(SIDEBAR_HTML)
+        soup.assert_not_called()
+        assert hrefs == ["/d3-scale", "/d3-scale/linear", "/d3-array"]
+
+    def test_falls_back_to_parser(self) -> None:
+        # Unquoted id: the regex scan misses it, the HTML parser doesn't
+        html = SIDEBAR_HTML.replace('id="VPSidebarNav"', "id=VPSidebarNav")
+        assert _sidebar_hrefs(html) == [
+            "/d3-scale",
+            "/d3-scale/linear",
+            "/d3-array",
+        ]
+
+    def test_missing_nav_raises(self) -> None:
+        with pytest.raises(RuntimeError, match="Could not find sidebar nav"):
+            _sidebar_hrefs("<html><body><nav><a href='/d3-x'>x</a></nav></body></html>")
+
+
+# --- fetch_live_registry tests ---
+
+
+class TestFetchLiveRegistry:
+    def test_fetches_and_saves_snapshot(self, tmp_path: Path) -> None:
+        cache_file = tmp_path / "_sync_registry.json"
+        fake = FakeGet(200, {"ETag": '"v1"', "Last-Modified": "Wed, 01 Oct 2025"})
+
+        with (
+            patch.object(sync, "_SYNC_CACHE", cache_file),
+            patch.object(sync.httpx, "get", fake),
+        ):
+            modules = fetch_live_registry()
+
+        assert modules == SIDEBAR_REGISTRY
+        assert fake.sent == [{}]
+        saved = json.loads(cache_file.read_text())
+        assert saved["parser_version"] == _PARSER_VERSION
+        assert saved["etag"] == '"v1"'
+        assert saved["last_modified"] == "Wed, 01 Oct 2025"
+        assert saved["modules"] == SIDEBAR_REGISTRY
+
+    def test_not_modified_reuses_snapshot(self, tmp_path: Path) -> None:
+        cache_file = tmp_path / "_sync_registry.json"
+        stored = {"d3-old": ["/d3-old"]}
+        snapshot = _RegistrySnapshot(
+            parser_version=_PARSER_VERSION,
+            etag='"v1"',
+            last_modified="Wed, 01 Oct 2025",
+            modules=stored,
+        )
+        cache_file.write_text(snapshot.model_dump_json())
+        fake = FakeGet(304)
+
+        with (
+            patch.object(sync, "_SYNC_CACHE", cache_file),
+            patch.object(sync.httpx, "get", fake),
+        ):
+            modules = fetch_live_registry()
+
+        assert modules == stored
+        assert fake.sent == [
+            {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Oct 2025"}
+        ]
+
+    def test_corrupt_snapshot_fetches_unconditionally(self, tmp_path: Path) -> None:
+        cache_file = tmp_path / "_sync_registry.json"
+        cache_file.write_text("not json")
+        fake = FakeGet(200, {"ETag": '"v2"'})
+
+        with (
+            patch.object(sync, "_SYNC_CACHE", cache_file),
+            patch.object(sync.httpx, "get", fake),
+        ):
+            modules = fetch_live_registry()
+
+        assert modules == SIDEBAR_REGISTRY
+        assert fake.sent == [{}]
+        assert json.loads(cache_file.read_text())["etag"] == '"v2"'
+
+    def test_snapshot_from_other_parser_version_is_ignored(
+        self, tmp_path: Path
+    ) -> None:
+        cache_file = tmp_path / "_sync_registry.json"
+        snapshot = _RegistrySnapshot(
+            parser_version=_PARSER_VERSION - 1,
+            etag='"v1"',
+            modules={"d3-old": ["/d3-old"]},
+        )
+        cache_file.write_text(snapshot.model_dump_json())
+        fake = FakeGet(200, {"ETag": '"v1"'})
+
+        with (
+            patch.object(sync, "_SYNC_CACHE", cache_file),
+            patch.object(sync.httpx, "get", fake),
+        ):
+            modules = fetch_live_registry()
+
+        assert modules == SIDEBAR_REGISTRY
+        assert fake.sent == [{}]
+
+    def test_undecodable_snapshot_fetches_unconditionally(self, tmp_path: Path) -> None:
+        cache_file = tmp_path / "_sync_registry.json"
+        cache_file.write_bytes(b'{"etag": "\xff')
+        fake = FakeGet(200)
+
+        with (
+            patch.object(sync, "_SYNC_CACHE", cache_file),
+            patch.object(sync.httpx, "get", fake),
+        ):
+            modules = fetch_live_registry()
+
+        assert modules == SIDEBAR_REGISTRY
+        assert fake.sent == [{}]
+
+    def test_unwritable_cache_still_returns_registry(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        # A file where the cache directory should be makes mkdir fail
+        blocker = tmp_path / "blocker"
+        blocker.write_text("")
+        fake = FakeGet(200, {"ETag": '"v1"'})
+
+        with (
+            patch.object(sync, "_SYNC_CACHE", blocker / "_sync_registry.json"),
+            patch.object(sync.httpx, "get", fake),
+        ):
+            modules = fetch_live_registry()
+
+        assert modules == SIDEBAR_REGISTRY
+        assert "Failed to save sync registry snapshot" in caplog.text